@@ -9,14 +9,24 @@ def generate_maze(width, height, num_letters, extra_paths=0):
     maze = [['#'] * width for _ in range(height)]
 
     def carve(x, y):
+        # Depth-first backtracker with an explicit stack so large mazes do not hit the recursion limit
         maze[y][x] = '.'
         dirs = [(2,0), (-2,0), (0,2), (0,-2)]
         random.shuffle(dirs)
-        for dx, dy in dirs:
-            nx, ny = x + dx, y + dy
-            if 1 <= nx < width-1 and 1 <= ny < height-1 and maze[ny][nx] == '#':
-                maze[y + dy//2][x + dx//2] = '.'
-                carve(nx, ny)
+        stack = [(x, y, iter(dirs))]
+        while stack:
+            x, y, remaining = stack[-1]
+            for dx, dy in remaining:
+                nx, ny = x + dx, y + dy
+                if 1 <= nx < width-1 and 1 <= ny < height-1 and maze[ny][nx] == '#':
+                    maze[y + dy//2][x + dx//2] = '.'
+                    maze[ny][nx] = '.'
+                    dirs = [(2,0), (-2,0), (0,2), (0,-2)]
+                    random.shuffle(dirs)
+                    stack.append((nx, ny, iter(dirs)))
+                    break
+            else:
+                stack.pop()
 
     carve(1, height-2)
     
@@ -0,0 +1,112 @@
+import numpy as np
+
+
+def auction(cost_matrix, prices=None, epsilon=None, scaling_factor=8):
+    """
+    Minimum cost assignment with Bertsekas' combined forward/reverse auction and
+    epsilon-scaling. The matrix may be rectangular; it is padded to a square one with
+    zero cost dummy rows or columns. Infinite costs mark forbidden pairs, which are
+    only used when nothing else is possible and are left out of the result.
+
+    Every phase ends with all pairs assigned under epsilon-complementary slackness, so
+    the total cost is within n * epsilon of the optimum. The default final epsilon is
+    below 1 / n, which makes the result optimal for integer costs such as path lengths.
+
+    :param cost_matrix: 2D array of costs, one row per agent and one column per task
+    :param prices: Optional task prices from an earlier call to start from
+    :param epsilon: Final epsilon, defaults to 1 / (n + 1)
+    :param scaling_factor: Factor by which epsilon shrinks between phases
+    :return: (row_ind, col_ind, prices) tuple; the index arrays are sorted by row like
+        scipy's linear_sum_assignment and prices has one entry per task column
+    """
+    cost_matrix = np.asarray(cost_matrix, dtype=float)
+    rows, cols = cost_matrix.shape
+    n = max(rows, cols)
+    if n == 0:
+        return np.array([], dtype=int), np.array([], dtype=int), np.zeros(cols)
+
+    forbidden = np.isinf(cost_matrix)
+    finite = cost_matrix[~forbidden]
+    largest = np.abs(finite).max() if finite.size else 0
+    # Dearer than any assignment made of allowed pairs only
+    penalty = (largest + 1) * n
+    benefit = np.zeros((n, n))
+    benefit[:rows, :cols] = -np.where(forbidden, penalty, cost_matrix)
+
+    price = np.zeros(n)
+    if prices is not None:
+        price[:cols] = prices
+    if epsilon is None:
+        epsilon = 1 / (n + 1)
+
+    current = max(np.abs(benefit).max() / 2, epsilon)
+    while True:
+        person_object = _auction_phase(benefit, price, current)
+        if current <= epsilon:
+            break
+        current = max(current / scaling_factor, epsilon)
+
+    row_ind = np.arange(rows)
+    col_ind = person_object[:rows]
+    keep = col_ind < cols
+    row_ind, col_ind = row_ind[keep], col_ind[keep]
+    keep = ~forbidden[row_ind, col_ind]
+    return row_ind[keep], col_ind[keep], price[:cols]
+
+
+def _auction_phase(benefit, price, epsilon):
+    """
+    One epsilon phase in Jacobi fashion: all unassigned persons bid for objects at once
+    (forward rounds) or all unassigned objects bid for persons at once (reverse
+    rounds). The direction switches only after a round that assigned a new pair.
+    :param benefit: Square benefit matrix
+    :param price: Object prices, updated in place
+    :return: Object index of every person
+    """
+    n = len(benefit)
+    if n == 1:
+        return np.zeros(1, dtype=int)
+    profit = (benefit - price).max(axis=1)
+    person_object = np.full(n, -1)
+    object_person = np.full(n, -1)
+    forward = True
+
+    while (person_object < 0).any():
+        if forward:
+            bidders = np.flatnonzero(person_object < 0)
+            values = benefit[bidders] - price
+        else:
+            bidders = np.flatnonzero(object_person < 0)
+            values = benefit[:, bidders].T - profit
+        # Each bidder raises its offer for its best choice up to the second best value
+        count = len(bidders)
+        best = values.argmax(axis=1)
+        best_benefit = values[np.arange(count), best] + (price[best] if forward else profit[best])
+        values[np.arange(count), best] = -np.inf
+        second_value = values.max(axis=1)
+        offer = best_benefit - second_value + epsilon
+
+        # Highest offer wins every contested choice
+        order = np.lexsort((offer, best))
+        last = np.append(best[order][1:] != best[order][:-1], True)
+        winners, chosen = bidders[order][last], best[order][last]
+        won = order[last]
+        if forward:
+            price[chosen] = offer[won]
+            profit[winners] = second_value[won] - epsilon
+            previous = object_person[chosen]
+            person_object[previous[previous >= 0]] = -1
+            new_pairs = (previous < 0).any()
+            person_object[winners] = chosen
+            object_person[chosen] = winners
+        else:
+            profit[chosen] = offer[won]
+            price[winners] = second_value[won] - epsilon
+            previous = person_object[chosen]
+            object_person[previous[previous >= 0]] = -1
+            new_pairs = (previous < 0).any()
+            object_person[winners] = chosen
+            person_object[chosen] = winners
+        if new_pairs:
+            forward = not forward
+    return person_object
@@ -0,0 +1,792 @@
+from Utils import generate_maze
+from excavator import Excavator
+from controller import Controller
+from search_algorithms import GridMap, JunctionGraph, DistanceField, DistanceFieldCache, WavefrontBFS, ClusterGraph
+from auction import auction
+from online_assignment import OnlineAssignment
+from parallel_costs import CostMatrixPool
+from simulation import SimulationEngine, EventScheduler
+from multi_agent_planning import CooperativePlanner, CBSPlanner
+from search_algorithms import AStarFinder
+from conflicts_detection import detect_region_conflicts, detect_opening_conflicts, ConflictMonitor
+from runner import run_scenario, simulate, Replanner
+from scout import Scout
+from Utils import load_maze, find_valid_positions
+from scipy.optimize import linear_sum_assignment
+import contextlib
+import numpy as np
+import io
+import os
+import random
+import time
+import tracemalloc
+
+random.seed(0)
+
+note_results = False
+maze_sizes = [51, 101, 201, 501, 1001]
+
+
+def prepare_maze(size, extra_paths=0):
+    """
+    Generate a square maze without letters, silencing the generator's progress output
+    :param size: Width and height of the maze
+    :param extra_paths: Number of extra walls to carve away
+    :return: 2D list representing the maze
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        maze, _ = generate_maze(size, size, 0, extra_paths)
+    return maze
+
+
+def prepare_room(size, pillar_spacing=(7, 9)):
+    """
+    Walled square room with a regular pattern of single-cell pillars
+    :param size: Width and height of the room
+    :param pillar_spacing: (rows, columns) between pillars
+    :return: 2D list representing the maze
+    """
+    maze = [['#'] * size] + [['#'] + ['.'] * (size - 2) + ['#'] for _ in range(size - 2)] + [['#'] * size]
+    for x in range(2, size - 2, pillar_spacing[0]):
+        for y in range(2, size - 2, pillar_spacing[1]):
+            maze[x][y] = '#'
+    return maze
+
+
+def measure_query(excavator):
+    """
+    Run one path query and measure its wall time and peak traced memory
+    :param excavator: Excavator with maze, path finder and target already set
+    :return: (path, seconds, peak bytes) tuple
+    """
+    tracemalloc.start()
+    start_time = time.time()
+    path = excavator.find_path()
+    end_time = time.time()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return path, end_time - start_time, peak
+
+
+def benchmark_memory_vs_size(path_finders=("BFS", "DFS")):
+    """
+    Time and memory of corner-to-corner queries as the maze grows
+    """
+    lines = []
+    for size in maze_sizes:
+        maze = prepare_maze(size)
+        # The shared grid model is a one-off per maze, keep it out of the per-query numbers
+        GridMap.of(maze)
+        for path_finder in path_finders:
+            excavator = Excavator((1, 1), "E1")
+            excavator.set_maze(maze)
+            excavator.set_path_finder(path_finder)
+            excavator.set_task({'target_letter': None, 'target_position': (size - 2, size - 2)})
+            path, seconds, peak = measure_query(excavator)
+            line = (f"maze {size}x{size} {path_finder}: path length {len(path)}, "
+                    f"time {seconds:.4f} s, peak memory {peak / 2**20:.2f} MiB")
+            print(line)
+            lines.append(line)
+    return lines
+
+
+def benchmark_finder_speed(size=501, extra_paths=20000, queries=5,
+                           path_finders=("BFS", "DFS", "AStar", "Dijkstra", "GBFS",
+                                         "BidirectionalBFS", "BidirectionalAStar"), maze=None):
+    """
+    Average query time and node expansions of every finder on one large maze; the
+    shared grid model and each finder's own preprocessing are built before timing and
+    reported separately
+    """
+    if maze is None:
+        maze = prepare_maze(size, extra_paths)
+    start_time = time.time()
+    GridMap.of(maze)
+    lines = [f"maze {size}x{size} grid model built in {time.time() - start_time:.4f} s"]
+    print(lines[0])
+    valid_positions = [(i, j) for i in range(size) for j in range(size) if maze[i][j] != '#']
+    pairs = [(random.choice(valid_positions), random.choice(valid_positions)) for _ in range(queries)]
+    for path_finder in path_finders:
+        excavator = Excavator((1, 1), "E1")
+        excavator.set_maze(maze)
+        excavator.set_path_finder(path_finder)
+        # The first query pays for any per-maze preprocessing the finder caches
+        excavator.set_task({'target_letter': None, 'target_position': pairs[0][1]})
+        start_time = time.time()
+        excavator.find_path()
+        first_query_time = time.time() - start_time
+        total_time = 0
+        total_expanded = 0
+        for start, goal in pairs:
+            excavator.position = start
+            excavator.set_task({'target_letter': None, 'target_position': goal})
+            start_time = time.time()
+            excavator.find_path()
+            total_time += time.time() - start_time
+            total_expanded += excavator.path_finder.expanded_nodes
+        line = (f"maze {size}x{size} {path_finder}: first query {first_query_time:.4f} s, "
+                f"average time {total_time / queries:.4f} s, average expansions {total_expanded / queries:.0f}")
+        print(line)
+        lines.append(line)
+    return lines
+
+
+def benchmark_open_grids(size=201, carve_fractions=(0, 0.25, 0.5, 1.0), queries=20, path_finders=("AStar", "JPS")):
+    """
+    A* against Jump Point Search as more and more interior walls are carved away from
+    a perfect maze, and in an open room with pillars
+    """
+    lines = []
+    for fraction in carve_fractions:
+        extra_paths = int(fraction * (size - 2) ** 2 / 2)
+        lines += benchmark_finder_speed(size, extra_paths, queries, path_finders)
+    lines += benchmark_finder_speed(size, 0, queries, path_finders, maze=prepare_room(size))
+    return lines
+
+
+def benchmark_junction_graph(sizes=(201, 501, 1001), extra_paths_per_cell=0.01, queries=10,
+                             path_finders=("AStar", "JunctionGraph")):
+    """
+    Size of the corridor-contracted graph and query cost against A* on mostly perfect mazes
+    """
+    lines = []
+    for size in sizes:
+        maze = prepare_maze(size, int(extra_paths_per_cell * size * size))
+        grid = GridMap.of(maze)
+        start_time = time.time()
+        graph = grid.get_derived('junction_graph', JunctionGraph)
+        line = (f"maze {size}x{size}: {sum(grid.walkable)} open cells contracted to "
+                f"{graph.node_count} nodes and {graph.edge_count} edges in {time.time() - start_time:.4f} s")
+        print(line)
+        lines.append(line)
+        lines += benchmark_finder_speed(size, queries=queries, path_finders=path_finders, maze=maze)
+    return lines
+
+
+def benchmark_wavefront(sizes=(21, 51, 101), source_counts=(10, 100, 1000), extra_paths_per_cell=0.05):
+    """
+    Distance fields for many sources: one pure Python BFS per source against the
+    vectorized WavefrontBFS
+    """
+    lines = []
+    for size in sizes:
+        maze = prepare_maze(size, int(extra_paths_per_cell * size * size))
+        grid = GridMap.of(maze)
+        valid_positions = [(i, j) for i in range(size) for j in range(size) if maze[i][j] != '#']
+        for count in source_counts:
+            sources = [random.choice(valid_positions) for _ in range(count)]
+            start_time = time.time()
+            for source in sources:
+                DistanceField(grid, source)
+            python_time = time.time() - start_time
+            start_time = time.time()
+            WavefrontBFS(maze).distances(sources)
+            wavefront_time = time.time() - start_time
+            line = (f"maze {size}x{size}, {count} sources: python BFS {python_time:.4f} s, "
+                    f"wavefront {wavefront_time:.4f} s")
+            print(line)
+            lines.append(line)
+    return lines
+
+
+def benchmark_hierarchical(sizes=(501, 1001, 2001), extra_paths_per_cell=0.01, queries=10, cluster_size=16,
+                           path_finders=("AStar", "HPA")):
+    """
+    Entrance detection time of the cluster graph and query latency of HPA* against flat
+    A* on very large mazes; the first HPA* query also pays for the clusters it touches
+    """
+    lines = []
+    for size in sizes:
+        maze = prepare_maze(size, int(extra_paths_per_cell * size * size))
+        grid = GridMap.of(maze)
+        start_time = time.time()
+        graph = grid.get_derived(('cluster_graph', cluster_size), lambda g: ClusterGraph(g, cluster_size))
+        line = (f"maze {size}x{size}: {len(graph.transitions)} abstract nodes in {len(graph.cluster_nodes)} "
+                f"clusters of {cluster_size}x{cluster_size} found in {time.time() - start_time:.4f} s")
+        print(line)
+        lines.append(line)
+        lines += benchmark_finder_speed(size, queries=queries, path_finders=path_finders, maze=maze)
+    return lines
+
+
+def benchmark_replanning(sizes=(101, 201, 501), extra_paths_per_cell=0.05, toggles=50, path_finders=("AStar", "DStarLite")):
+    """
+    Replanning cost while walls are toggled one at a time next to the current path:
+    full re-search with each finder's first query excluded
+    """
+    lines = []
+    for size in sizes:
+        maze = prepare_maze(size, int(extra_paths_per_cell * size * size))
+        grid = GridMap.of(maze)
+        excavators = []
+        for path_finder in path_finders:
+            excavator = Excavator((1, 1), "E1")
+            excavator.set_maze(maze)
+            excavator.set_path_finder(path_finder)
+            excavator.set_task({'target_letter': None, 'target_position': (size - 2, size - 2)})
+            excavator.find_path()
+            excavators.append(excavator)
+        total_times = [0] * len(path_finders)
+        total_expanded = [0] * len(path_finders)
+        for _ in range(toggles):
+            path = excavators[0].find_path()
+            # Flip a wall right next to a random cell of the current path
+            x, y = random.choice(path[1:-1]) if len(path) > 2 else (1, 1)
+            candidates = [(x + dx, y + dy) for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                          if 0 < x + dx < size - 1 and 0 < y + dy < size - 1 and (x + dx, y + dy) != (size - 2, size - 2)]
+            x, y = random.choice(candidates)
+            grid.set_cell(x, y, '.' if maze[x][y] == '#' else '#')
+            for index, excavator in enumerate(excavators):
+                start_time = time.time()
+                excavator.find_path()
+                total_times[index] += time.time() - start_time
+                total_expanded[index] += excavator.path_finder.expanded_nodes
+        for index, path_finder in enumerate(path_finders):
+            line = (f"maze {size}x{size} {path_finder}: average replanning time {total_times[index] / toggles:.4f} s, "
+                    f"average expansions {total_expanded[index] / toggles:.0f}")
+            print(line)
+            lines.append(line)
+    return lines
+
+
+def benchmark_assignment(size=201, counts=(50, 100, 200, 400), extra_paths_per_cell=0.05):
+    """
+    Auction against scipy's Hungarian solver on path length matrices of growing fleets
+    """
+    maze = prepare_maze(size, int(extra_paths_per_cell * size * size))
+    wavefront = WavefrontBFS(maze)
+    valid_positions = [(i, j) for i in range(size) for j in range(size) if maze[i][j] != '#']
+    lines = []
+    for count in counts:
+        excavators = random.sample(valid_positions, count)
+        targets = random.sample(valid_positions, count)
+        cost_matrix = wavefront.distance_matrix(excavators, targets) + 1
+        start_time = time.time()
+        row_ind, col_ind, _ = auction(cost_matrix)
+        auction_time = time.time() - start_time
+        start_time = time.time()
+        optimal_rows, optimal_cols = linear_sum_assignment(cost_matrix)
+        hungarian_time = time.time() - start_time
+        line = (f"{count} excavators: auction {auction_time:.4f} s total {cost_matrix[row_ind, col_ind].sum()}, "
+                f"hungarian {hungarian_time:.4f} s total {cost_matrix[optimal_rows, optimal_cols].sum()}")
+        print(line)
+        lines.append(line)
+    return lines
+
+
+def benchmark_sparse_assignment(size=101, counts=(100, 300, 1000), extra_paths_per_cell=0.05,
+                                assignment_methods=("hungarian", "sparse")):
+    """
+    Dense Hungarian against the k-nearest sparse assignment with as many excavators as
+    targets; path lengths come from a fresh distance field cache for every method
+    """
+    maze = prepare_maze(size, int(extra_paths_per_cell * size * size))
+    valid_positions = [(i, j) for i in range(size) for j in range(size) if maze[i][j] != '#']
+    lines = []
+    for count in counts:
+        starts = random.sample(valid_positions, count)
+        targets = {f"T{j}": position for j, position in enumerate(random.sample(valid_positions, count))}
+        for assignment_method in assignment_methods:
+            controller = Controller((1, 1), "C1")
+            controller.set_distance_fields(DistanceFieldCache())
+            controller.recieve_target_letter(targets)
+            for j, start in enumerate(starts):
+                excavator = Excavator(start, f"E{j+1}")
+                excavator.set_maze(maze)
+                excavator.set_path_finder("AStar")
+                controller.add_excavator(excavator)
+            start_time = time.time()
+            tasks = controller.assign_tasks(assignment_method)
+            seconds = time.time() - start_time
+            total_path_length = sum(len(task['excavator'].find_path()) for task in tasks)
+            line = (f"{count} excavators {assignment_method}: time {seconds:.4f} s, "
+                    f"{len(tasks)} tasks, total path length {total_path_length}")
+            print(line)
+            lines.append(line)
+    return lines
+
+
+def check_online_assignment(sequences=200, events=40, switch_costs=(0, 5, 15), max_cost=30, seed=0):
+    """
+    Random sequences of agent and task events on an OnlineAssignment, checked after every
+    event against a full linear_sum_assignment solve of the true costs less the discounts
+    of the live commitments. Also checks that the kept matrix holds exactly those costs.
+    :return: Lines reporting the number of events checked per switch cost
+    """
+    lines = []
+    rng = random.Random(seed)
+    for switch_cost in switch_costs:
+        checked = 0
+        for _ in range(sequences):
+            online = OnlineAssignment(switch_cost)
+            true_costs = {}  # (agent, task) -> cost, missing if unreachable
+            agents, tasks = [], []
+            for event in range(events):
+                kind = rng.choice(("add_agent", "add_task", "remove_agent", "remove_task", "update_agent", "commit"))
+                if kind == "add_agent" or (kind == "update_agent" and agents):
+                    agent = f"A{event}" if kind == "add_agent" else rng.choice(agents)
+                    costs = {task: rng.randint(0, max_cost) for task in tasks if rng.random() < 0.9}
+                    for task in tasks:
+                        true_costs.pop((agent, task), None)
+                    true_costs.update({(agent, task): cost for task, cost in costs.items()})
+                    if kind == "add_agent":
+                        agents.append(agent)
+                        online.add_agent(agent, costs)
+                    else:
+                        online.update_agent(agent, costs)
+                elif kind == "add_task":
+                    task = f"T{event}"
+                    costs = {agent: rng.randint(0, max_cost) for agent in agents if rng.random() < 0.9}
+                    true_costs.update({(agent, task): cost for agent, cost in costs.items()})
+                    tasks.append(task)
+                    online.add_task(task, costs)
+                elif kind == "remove_agent" and agents:
+                    agent = agents.pop(rng.randrange(len(agents)))
+                    online.remove_agent(agent)
+                elif kind == "remove_task" and tasks:
+                    task = tasks.pop(rng.randrange(len(tasks)))
+                    online.remove_task(task)
+                elif kind == "commit":
+                    online.commit()
+
+                n = len(online.agents)
+                expected = np.zeros((n, n))
+                for row, agent in enumerate(online.agents):
+                    for column, task in enumerate(online.tasks):
+                        if agent is None or task is None:
+                            continue
+                        cost = true_costs.get((agent, task), OnlineAssignment.unreachable_cost)
+                        if online.committed[row] == column:
+                            cost -= switch_cost
+                        expected[row, column] = cost
+                assert np.array_equal(online.cost, expected), f"kept costs drifted after {kind}"
+                rows, columns = linear_sum_assignment(expected)
+                total = expected[np.arange(n), online.row_match].sum() if n else 0
+                assert total == expected[rows, columns].sum(), f"suboptimal matching after {kind}"
+                checked += 1
+        line = f"switch cost {switch_cost}: {checked} events match a full solve"
+        print(line)
+        lines.append(line)
+    return lines
+
+
+def benchmark_nearest_assignment(counts=(1000, 10000), target_count=26, size=1001):
+    """
+    Nearest assignment through the controller's spatial index against a linear min() over
+    all available excavators per target, on random positions of a size x size area
+    """
+    lines = []
+    for count in counts:
+        controller = Controller((0, 0), "C1")
+        for j in range(count):
+            controller.add_excavator(Excavator((random.randrange(size), random.randrange(size)), f"E{j+1}"))
+        controller.recieve_target_letter({f"T{j}": (random.randrange(size), random.randrange(size))
+                                          for j in range(target_count)})
+        available_excavators = list(controller.excavators)
+        start_time = time.time()
+        for target_pos in controller.target_letters.values():
+            nearest_excavator = min(available_excavators, key=lambda e: controller.calculate_distance(e.position, target_pos))
+            available_excavators.remove(nearest_excavator)
+        linear_time = time.time() - start_time
+        start_time = time.time()
+        controller.assign_tasks('nearest')
+        index_time = time.time() - start_time
+        line = (f"{count} excavators, {target_count} targets: linear scan {linear_time:.4f} s, "
+                f"spatial index {index_time:.4f} s")
+        print(line)
+        lines.append(line)
+    return lines
+
+
+def benchmark_parallel_costs(size=201, counts=(50, 100, 200), target_count=26, extra_paths_per_cell=0.05,
+                             worker_counts=(1, 2, 4, 8)):
+    """
+    Serial path length matrix against a CostMatrixPool with growing worker counts; the
+    pool is started and warmed up before timing, as it is reused between assignments
+    """
+    maze = prepare_maze(size, int(extra_paths_per_cell * size * size))
+    valid_positions = [(i, j) for i in range(size) for j in range(size) if maze[i][j] != '#']
+    targets = [(f"T{j}", position) for j, position in enumerate(random.sample(valid_positions, target_count))]
+    lines = []
+    for count in counts:
+        controller = Controller((1, 1), "C1")
+        for j, start in enumerate(random.sample(valid_positions, count)):
+            excavator = Excavator(start, f"E{j+1}")
+            excavator.set_maze(maze)
+            excavator.set_path_finder("AStar")
+            controller.add_excavator(excavator)
+        start_time = time.time()
+        serial = controller.path_length_matrix(controller.excavators, targets)
+        line = f"{count} excavators: serial {time.time() - start_time:.4f} s"
+        for workers in worker_counts:
+            with CostMatrixPool(maze, max_workers=workers) as pool:
+                pool.path_length_matrix(controller.excavators[:workers], targets[:1])
+                controller.set_cost_pool(pool)
+                start_time = time.time()
+                parallel = controller.path_length_matrix(controller.excavators, targets)
+                line += f", {workers} workers {time.time() - start_time:.4f} s"
+                line += "" if (parallel == serial).all() else " (differs from serial)"
+                controller.set_cost_pool(None)
+        print(line)
+        lines.append(line)
+    return lines
+
+
+def benchmark_simulation(counts=(100, 1000, 10000), size=201, path_length=200):
+    """
+    Ticks per second of moving every excavator with its own move() call against one
+    vectorized SimulationEngine.step(), on random walks of path_length cells. The fleet
+    belongs to a controller, so its excavator index is kept up to date as well.
+    """
+    lines = []
+    for count in counts:
+        seconds = {}
+        for mode in ("move", "step"):
+            rng = random.Random(count)
+            engine = SimulationEngine()
+            controller = Controller((0, 0), "C1")
+            excavators = []
+            for j in range(count):
+                excavator = Excavator((rng.randrange(size), rng.randrange(size)), f"E{j+1}", engine)
+                excavator.path = [(rng.randrange(size), rng.randrange(size)) for _ in range(path_length)]
+                excavator.has_target = True
+                excavators.append(excavator)
+                controller.add_excavator(excavator)
+            start_time = time.time()
+            ticks = 0
+            while engine.busy():
+                if mode == "step":
+                    engine.step()
+                else:
+                    for excavator in excavators:
+                        excavator.move()
+                ticks += 1
+                if ticks % 50 == 0:
+                    controller.excavator_index.nearest((size // 2, size // 2))
+            seconds[mode] = (time.time() - start_time) / ticks
+        line = (f"{count} excavators: move() loop {1 / seconds['move']:.1f} ticks/s, "
+                f"engine step {1 / seconds['step']:.1f} ticks/s")
+        print(line)
+        lines.append(line)
+    return lines
+
+
+def benchmark_event_scheduler(path_lengths=(100, 1000, 10000, 100000), count=100, legs=3):
+    """
+    Seconds to run excavators along corridors of growing length, each with a tour of
+    a few legs, stepping every tick against jumping from arrival to arrival
+    """
+    lines = []
+    for path_length in path_lengths:
+        seconds = {}
+        completion = {}
+        for mode in ("step", "event"):
+            engine = SimulationEngine(capacity=count)
+            for j in range(count):
+                excavator = Excavator((j, 0), f"E{j+1}", engine)
+                # An array rather than a list of tuples, so that setting a path is a plain copy
+                corridor = np.stack([np.full(path_length, j), np.arange(path_length)], axis=1)
+                excavator.find_path = lambda corridor=corridor: corridor
+                excavator.set_tour([{'target_position': (j, path_length - 1), 'target_letter': "A"}] * legs)
+                excavator.path = corridor
+            start_time = time.time()
+            if mode == "step":
+                ticks = 0
+                while engine.busy():
+                    engine.step()
+                    ticks += 1
+            else:
+                ticks = EventScheduler(engine).run()
+            seconds[mode] = time.time() - start_time
+            completion[mode] = ticks
+        line = (f"path length {path_length}: completion time {completion['step']} ticks, "
+                f"step {seconds['step']:.3f} s, event {seconds['event']:.3f} s")
+        print(line)
+        lines.append(line)
+    return lines
+
+
+def count_conflicts(paths):
+    """
+    Region and opening conflicts between paths, as counted by conflicts_detection
+    """
+    trial = {'paths': {f"E{j+1}": path for j, path in enumerate(paths) if path}}
+    if not trial['paths']:
+        return 0, 0
+    return len(detect_region_conflicts(trial)), len(detect_opening_conflicts(trial))
+
+
+def benchmark_cooperative_planning(size=51, counts=(10, 25, 50, 100), extra_paths_per_cell=0.1):
+    """
+    Independent A* paths against cooperative space-time A* for growing fleets: planning
+    time, makespan (longest path), total path length and remaining conflicts
+    """
+    maze = prepare_maze(size, int(extra_paths_per_cell * size * size))
+    valid_positions = [(i, j) for i in range(size) for j in range(size) if maze[i][j] != '#']
+    lines = []
+    for count in counts:
+        starts = random.sample(valid_positions, count)
+        goals = random.sample(valid_positions, count)
+
+        finder = AStarFinder(maze)
+        start_time = time.time()
+        independent = [finder.find_path(start, goal) for start, goal in zip(starts, goals)]
+        independent_time = time.time() - start_time
+
+        planner = CooperativePlanner(maze)
+        start_time = time.time()
+        cooperative = planner.plan(starts, goals)
+        cooperative_time = time.time() - start_time
+        planned = [path for j, path in enumerate(cooperative) if j not in planner.failed]
+
+        for name, seconds, paths in (("independent", independent_time, independent),
+                                     ("cooperative", cooperative_time, planned)):
+            region_conflicts, opening_conflicts = count_conflicts(paths)
+            line = (f"{count} excavators {name}: time {seconds:.4f} s, makespan {max(map(len, paths), default=0)}, "
+                    f"total path length {sum(map(len, paths))}, RC {region_conflicts}, OC {opening_conflicts}")
+            if name == "cooperative":
+                line += f", no path for {len(planner.failed)}"
+            print(line)
+            lines.append(line)
+    return lines
+
+
+def benchmark_cbs(size=21, counts=(4, 8, 12), extra_paths_per_cell=0.1, suboptimalities=(1.0, 1.5)):
+    """
+    Prioritised planning against CBS with growing suboptimality bounds on small fleets:
+    planning time, sum of path costs and high-level nodes expanded
+    """
+    maze = prepare_maze(size, int(extra_paths_per_cell * size * size))
+    valid_positions = [(i, j) for i in range(size) for j in range(size) if maze[i][j] != '#']
+    lines = []
+    for count in counts:
+        starts = random.sample(valid_positions, count)
+        goals = random.sample(valid_positions, count)
+        planners = [("cooperative", CooperativePlanner(maze))]
+        planners += [(f"CBS w={w}", CBSPlanner(maze, suboptimality=w)) for w in suboptimalities]
+        for name, planner in planners:
+            start_time = time.time()
+            paths = planner.plan(starts, goals)
+            seconds = time.time() - start_time
+            line = (f"{count} excavators {name}: time {seconds:.4f} s, "
+                    f"sum of costs {sum(len(path) - 1 for path in paths if path)}, no path for {len(planner.failed)}")
+            if isinstance(planner, CBSPlanner):
+                line += f", nodes expanded {planner.expanded_nodes}, solved {planner.solved}"
+            print(line)
+            lines.append(line)
+    return lines
+
+
+def benchmark_conflict_detection(counts=(100, 1000, 5000), path_length=200, size=101, wait_probability=0.2):
+    """
+    Conflict detection on synthetic fleets of random walks on an open size x size area
+    """
+    lines = []
+    for count in counts:
+        paths = {}
+        for j in range(count):
+            x, y = random.randrange(size), random.randrange(size)
+            path = [(x, y)]
+            for _ in range(path_length - 1):
+                if random.random() >= wait_probability:
+                    dx, dy = random.choice(((-1, 0), (1, 0), (0, -1), (0, 1)))
+                    x, y = min(max(x + dx, 0), size - 1), min(max(y + dy, 0), size - 1)
+                path.append((x, y))
+            paths[f"E{j+1}"] = path
+        trial = {'paths': paths}
+        start_time = time.time()
+        region_conflicts = detect_region_conflicts(trial)
+        region_time = time.time() - start_time
+        start_time = time.time()
+        opening_conflicts = detect_opening_conflicts(trial)
+        opening_time = time.time() - start_time
+        line = (f"{count} excavators, {count * path_length} path cells: region {region_time:.4f} s "
+                f"({len(region_conflicts)} RC), opening {opening_time:.4f} s ({len(opening_conflicts)} OC)")
+        print(line)
+        lines.append(line)
+    return lines
+
+
+def benchmark_scout_scans(size=1001, radar_ranges=(5, 20, 50), letter_count=200, scans=500):
+    """
+    Radar scans per second walking every cell of the scan window against the scout's
+    letter index, on a maze with letters scattered over random open cells
+    """
+    lines = []
+    maze = prepare_maze(size, extra_paths=size * size // 20)
+    open_cells = [(x, y) for x in range(size) for y in range(size) if maze[x][y] != '#']
+    for x, y in random.sample(open_cells, letter_count):
+        GridMap.of(maze).set_cell(x, y, random.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    positions = random.sample(open_cells, scans)
+    for radar_range in radar_ranges:
+        start_time = time.time()
+        for x, y in positions:
+            detected = {}
+            for i in range(max(0, x - radar_range), min(size, x + radar_range + 1)):
+                for j in range(max(0, y - radar_range), min(size, y + radar_range + 1)):
+                    if maze[i][j].isalpha():
+                        detected[maze[i][j]] = (i, j)
+        window_time = time.time() - start_time
+        scout = Scout(positions[0], "S1", radar_range)
+        scout.scan_area(maze)  # Builds the index
+        start_time = time.time()
+        for position in positions:
+            scout.position = position
+            scout.scan_area(maze)
+        index_time = time.time() - start_time
+        line = (f"radar range {radar_range}: window walk {scans / window_time:.0f} scans/s, "
+                f"letter index {scans / index_time:.0f} scans/s")
+        print(line)
+        lines.append(line)
+    return lines
+
+
+def benchmark_headless_runner(episodes=200, number_of_excavators=10, methods=("nearest", "hungarian", "tour")):
+    """
+    Episodes per minute of whole headless scenarios on the experiment mazes: assignment,
+    path finding and simulation until every letter is reached
+    """
+    lines = []
+    mazes = [load_maze(f"./mazes/maze_{i}.txt") for i in range(10)]
+    for method in methods:
+        rng = random.Random(0)
+        completion_time = 0
+        start_time = time.time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for episode in range(episodes):
+                maze, letters_positions = mazes[episode % len(mazes)]
+                starts = rng.sample(find_valid_positions(maze), number_of_excavators)
+                completion_time += run_scenario(maze, starts, letters_positions, method)['completion_time']
+        seconds = time.time() - start_time
+        line = (f"{method}: {episodes / seconds * 60:.0f} episodes/min, "
+                f"mean completion time {completion_time / episodes:.1f} ticks")
+        print(line)
+        lines.append(line)
+    return lines
+
+
+def write_results(name, lines):
+    os.makedirs("./results/benchmark", exist_ok=True)
+    with open(f"./results/benchmark/{name}.txt", "w") as f:
+        for line in lines:
+            f.write(line + "\n")
+
+
+def check_conflict_replanning(size=21, runs=50, count=6, seed=0):
+    """
+    Runs that replan on every conflict, with the first two excavators starting on the same
+    cell, checked to end with every excavator on its target
+    :return: Lines reporting the number of runs checked
+    """
+    rng = random.Random(seed)
+    maze = prepare_maze(size, size)
+    valid_positions = [(i, j) for i in range(size) for j in range(size) if maze[i][j] != '#']
+    replans = 0
+    for run in range(runs):
+        engine = SimulationEngine(capacity=count)
+        starts = rng.sample(valid_positions, count - 1)
+        starts.insert(0, starts[0])
+        targets = rng.sample(valid_positions, count)
+        excavators = []
+        for j, (start, target) in enumerate(zip(starts, targets)):
+            excavator = Excavator(start, f"E{j+1}", engine)
+            excavator.set_maze(maze)
+            excavator.set_path_finder("AStar")
+            excavator.set_task({'target_letter': f"T{j}", 'target_position': target})
+            excavator.path = excavator.find_path()
+            excavators.append(excavator)
+        monitor = ConflictMonitor()
+        replanner = Replanner(maze, monitor)
+        simulate(engine, [monitor, replanner], max_ticks=10 * size * size)
+        replans += replanner.conflicts > 0
+        for excavator in excavators:
+            assert excavator.position == excavator.target, f"{excavator.robot_id} left its target in run {run}"
+    line = f"{runs} runs from a shared cell end on every target, {replans} with replanning"
+    print(line)
+    return [line]
+
+
+if __name__ == "__main__":
+    lines = benchmark_memory_vs_size()
+    if note_results:
+        write_results("memory_vs_size", lines)
+
+    lines = benchmark_finder_speed()
+    if note_results:
+        write_results("finder_speed", lines)
+
+    lines = benchmark_finder_speed(size=1001, extra_paths=0)
+    if note_results:
+        write_results("finder_speed_perfect_maze", lines)
+
+    lines = benchmark_open_grids()
+    if note_results:
+        write_results("open_grids", lines)
+
+    lines = benchmark_junction_graph()
+    if note_results:
+        write_results("junction_graph", lines)
+
+    lines = benchmark_wavefront()
+    if note_results:
+        write_results("wavefront", lines)
+
+    lines = benchmark_hierarchical()
+    if note_results:
+        write_results("hierarchical", lines)
+
+    lines = benchmark_replanning()
+    if note_results:
+        write_results("replanning", lines)
+
+    lines = benchmark_assignment()
+    if note_results:
+        write_results("assignment", lines)
+
+    lines = benchmark_sparse_assignment()
+    if note_results:
+        write_results("sparse_assignment", lines)
+
+    lines = check_online_assignment()
+    if note_results:
+        write_results("online_assignment_check", lines)
+
+    lines = check_conflict_replanning()
+    if note_results:
+        write_results("conflict_replanning_check", lines)
+
+    lines = benchmark_nearest_assignment()
+    if note_results:
+        write_results("nearest_assignment", lines)
+
+    lines = benchmark_parallel_costs()
+    if note_results:
+        write_results("parallel_costs", lines)
+
+    lines = benchmark_simulation()
+    if note_results:
+        write_results("simulation", lines)
+
+    lines = benchmark_event_scheduler()
+    if note_results:
+        write_results("event_scheduler", lines)
+
+    lines = benchmark_cooperative_planning()
+    if note_results:
+        write_results("cooperative_planning", lines)
+
+    lines = benchmark_cbs()
+    if note_results:
+        write_results("cbs", lines)
+
+    lines = benchmark_conflict_detection()
+    if note_results:
+        write_results("conflict_detection", lines)
+
+    lines = benchmark_scout_scans()
+    if note_results:
+        write_results("scout_scans", lines)
+
+    lines = benchmark_headless_runner()
+    if note_results:
+        write_results("headless_runner", lines)
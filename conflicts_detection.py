@@ -1,6 +1,4 @@
 import re
-from collections import defaultdict
-import pandas as pd
 
 def parse_file(file_path):
     with open(file_path, 'r') as f:
@@ -31,65 +29,174 @@ def parse_file(file_path):
     return parsed_trials
 
 def detect_region_conflicts(trial):
+    """
+    Pairs of excavators in the same position at the same time step, in one pass over
+    all paths with a (time step, position) hash. Conflicts come ordered by position (in
+    order of first appearance), then time step, then excavator order.
+    """
     paths = trial['paths']
     region_conflicts = []
-    
-    max_path_length = max(len(path) for path in paths.values())
-    
-    position_occupancy = defaultdict(list)
+
+    occupant = {}  # (t, position) -> first excavator there
+    shared = {}  # (t, position) -> all excavators there, for positions taken more than once
+    first_seen = {}  # position -> order of first appearance
     for excavator, path in paths.items():
         for t, pos in enumerate(path):
-            position_occupancy[pos].append((excavator, t))
-    
-    for position, occupancy_list in position_occupancy.items():
-        if len(occupancy_list) <= 1:
-            continue
+            if pos not in first_seen:
+                first_seen[pos] = len(first_seen)
+            key = (t, pos)
+            if key in occupant:
+                shared.setdefault(key, [occupant[key]]).append(excavator)
+            else:
+                occupant[key] = excavator
 
-        occupancy_list.sort(key=lambda x: x[1])
-        
-        for i in range(len(occupancy_list)):
-            for j in range(i+1, len(occupancy_list)):
-                excavator_i, time_i = occupancy_list[i]
-                excavator_j, time_j = occupancy_list[j]
-                
-                if time_i == time_j:
-                    region_conflicts.append({
-                        'type': 'RC',
-                        'position': position,
-                        'time_step': time_i,
-                        'excavators': [excavator_i, excavator_j]
-                    })
+    for t, position in sorted(shared, key=lambda key: (first_seen[key[1]], key[0])):
+        excavators = shared[(t, position)]
+        for i in range(len(excavators)):
+            for j in range(i+1, len(excavators)):
+                region_conflicts.append({
+                    'type': 'RC',
+                    'position': position,
+                    'time_step': t,
+                    'excavators': [excavators[i], excavators[j]]
+                })
     
     return region_conflicts
 
 def detect_opening_conflicts(trial):
+    """
+    Pairs of excavators swapping positions between two time steps, in one pass over all
+    paths with a hash of moves keyed by (t, min(u, v), max(u, v)), which both moves of
+    a swap share. Every swap is reported once for each of the two excavators, ordered by
+    excavator, then time step, then the other excavator.
+    """
     paths = trial['paths']
     opening_conflicts = []
-    
-    for excavator_i, path_i in paths.items():
-        for t in range(1, len(path_i)):
-            prev_pos_i = path_i[t-1]
-            curr_pos_i = path_i[t]
-            
-            if prev_pos_i != curr_pos_i:
-                for excavator_j, path_j in paths.items():
-                    if excavator_i == excavator_j or t >= len(path_j):
-                        continue
-                        
-                    prev_pos_j = path_j[t-1] if t-1 < len(path_j) else None
-                    curr_pos_j = path_j[t]
-                    
-                    if prev_pos_j and prev_pos_j != curr_pos_j:
-                        if curr_pos_i == prev_pos_j and prev_pos_i == curr_pos_j:
-                            opening_conflicts.append({
-                                'type': 'OC',
-                                'positions': (prev_pos_i, curr_pos_i),
-                                'time_step': t,
-                                'excavators': [excavator_i, excavator_j]
-                            })
+
+    order = {excavator: index for index, excavator in enumerate(paths)}
+    first_move = {}  # (t, min(u, v), max(u, v)) -> (excavator, u) of the first move along the edge
+    shared = {}  # Same key -> all (excavator, u) moving along the edge, for edges used more than once
+    for excavator, path in paths.items():
+        for t in range(1, len(path)):
+            prev_pos = path[t-1]
+            curr_pos = path[t]
+            if prev_pos != curr_pos:
+                key = (t, min(prev_pos, curr_pos), max(prev_pos, curr_pos))
+                if key in first_move:
+                    shared.setdefault(key, [first_move[key]]).append((excavator, prev_pos))
+                else:
+                    first_move[key] = (excavator, prev_pos)
+
+    swaps = []
+    for (t, u, v), moves in shared.items():
+        for excavator_i, prev_pos_i in moves:
+            curr_pos_i = v if prev_pos_i == u else u
+            for excavator_j, prev_pos_j in moves:
+                if prev_pos_j == curr_pos_i:
+                    swaps.append((order[excavator_i], t, order[excavator_j], {
+                        'type': 'OC',
+                        'positions': (prev_pos_i, curr_pos_i),
+                        'time_step': t,
+                        'excavators': [excavator_i, excavator_j]
+                    }))
+    swaps.sort(key=lambda swap: swap[:3])
+    opening_conflicts.extend(swap[3] for swap in swaps)
     
     return opening_conflicts
 
+class ConflictMonitor:
+    """
+    Finds region and opening conflicts while the excavators move, from one observation
+    per tick, instead of from paths written to a results file. The rules are those of
+    detect_region_conflicts and detect_opening_conflicts applied to the paths: an
+    excavator takes part while it has path left, and a swap is reported once for each
+    of the two excavators. Only the positions of the last tick are kept.
+    """
+    def __init__(self, on_conflict=None, stop_on_conflict=False):
+        """
+        :param on_conflict: Optional function called with every conflict as it is found
+        :param stop_on_conflict: Set stopped after the first tick with a conflict
+        """
+        self.on_conflict = on_conflict
+        self.stop_on_conflict = stop_on_conflict
+        self.time_step = -1
+        self.previous = {}  # Excavator -> position at the last tick it took part in
+        self.region_conflicts = 0
+        self.opening_conflicts = 0
+        self.stopped = False
+
+    def observe(self, excavators):
+        """
+        Check one tick; call once before the first move and after every tick
+        :param excavators: List of all excavators
+        :return: List of the conflicts of this tick, in the format of the functions above
+        """
+        self.time_step += 1
+        t = self.time_step
+        current = {}
+        occupant = {}  # position -> first excavator there
+        shared = {}  # position -> all excavators there, for positions taken more than once
+        first_move = {}  # (min(u, v), max(u, v)) -> (excavator, u) of the first move along the edge
+        shared_moves = {}
+        for excavator in excavators:
+            if not excavator.path_length:
+                continue
+            pos = excavator.position
+            current[excavator] = pos
+            if pos in occupant:
+                shared.setdefault(pos, [occupant[pos]]).append(excavator)
+            else:
+                occupant[pos] = excavator
+            prev_pos = self.previous.get(excavator)
+            if prev_pos is not None and prev_pos != pos:
+                key = (min(prev_pos, pos), max(prev_pos, pos))
+                if key in first_move:
+                    shared_moves.setdefault(key, [first_move[key]]).append((excavator, prev_pos))
+                else:
+                    first_move[key] = (excavator, prev_pos)
+        self.previous = current
+
+        conflicts = []
+        for position, sharing in shared.items():
+            for i in range(len(sharing)):
+                for j in range(i+1, len(sharing)):
+                    conflicts.append({
+                        'type': 'RC',
+                        'position': position,
+                        'time_step': t,
+                        'excavators': [sharing[i].id, sharing[j].id]
+                    })
+        for (u, v), moves in shared_moves.items():
+            for excavator_i, prev_pos_i in moves:
+                curr_pos_i = v if prev_pos_i == u else u
+                for excavator_j, prev_pos_j in moves:
+                    if prev_pos_j == curr_pos_i:
+                        conflicts.append({
+                            'type': 'OC',
+                            'positions': (prev_pos_i, curr_pos_i),
+                            'time_step': t,
+                            'excavators': [excavator_i.id, excavator_j.id]
+                        })
+
+        for conflict in conflicts:
+            if conflict['type'] == 'RC':
+                self.region_conflicts += 1
+            else:
+                self.opening_conflicts += 1
+            if self.on_conflict is not None:
+                self.on_conflict(conflict)
+        if conflicts and self.stop_on_conflict:
+            self.stopped = True
+        return conflicts
+
+    def on_tick(self, engine, tick):
+        """
+        Observer hook for runner.simulate
+        :return: True once the run should stop
+        """
+        self.observe(engine.robots)
+        return self.stopped
+
 def conflict_detection(task_assign_method):
     trials = parse_file(f'results/experiment_2/{task_assign_method}.txt')
     
@@ -130,6 +237,8 @@ def conflict_detection(task_assign_method):
     return total_rc, total_oc
 
 if __name__ == "__main__":
+    import pandas as pd  # Only needed for the table, so the detectors work without pandas
+
     methods = ["random", "nearest", "simple_hungarian", "hungarian", "bid"]
     
     df = pd.DataFrame(columns=methods)
@@ -2,18 +2,37 @@ from robot import Robot
 import random
 import numpy as np
 from scipy.optimize import linear_sum_assignment
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+from scipy.spatial import cKDTree
 from excavator import Excavator
+from auction import auction
+from online_assignment import OnlineAssignment
+from history import History
+from spatial_index import GridIndex
+from tour_planning import plan_tours
+from search_algorithms import GridMap, DistanceFieldCache
 
 class Controller(Robot):
     def __init__(self, position, robot_id):
         super().__init__(position, robot_id)
         self.excavators = []
         self.target_letters = {}
-        self.command_history = []
+        self.command_history = History()
+        self.distance_fields = None
+        self.wavefront = None
+        self.cost_pool = None  # CostMatrixPool building path length matrices in worker processes
+        self.online_assignment = None  # OnlineAssignment kept between calls of the 'online' method
+        self.excavator_index = GridIndex()  # Positions of all excavators, brought up to date before every query
+        self.target_distances = None  # (maze version, target positions, distance matrix) of the last tour plan
         
     
     def add_excavator(self, excavator):
         self.excavators.append(excavator)
+        self.excavator_index.insert(excavator, excavator.position)
+        self.excavator_index.follow(excavator.engine)
+        if self.distance_fields is not None:
+            excavator.set_distance_fields(self.distance_fields)
         self.command_history.append({
             'type': 'add_excavator',
             'excavator_id': excavator.robot_id
@@ -33,18 +52,28 @@ class Controller(Robot):
             tasks = self._assign_hungarian(available_excavators)
         elif assignment_method == 'bid':
             tasks = self._assign_bid_algorithm(available_excavators)
+        elif assignment_method == 'online':
+            tasks = self._assign_online()
+        elif assignment_method == 'sparse':
+            tasks = self._assign_sparse(available_excavators)
+        elif assignment_method == 'tour':
+            tasks = self._assign_tour(available_excavators)
         return tasks
         
     def _assign_nearest(self, available_excavators):
         tasks = []
+        for excavator in available_excavators:
+            if excavator not in self.excavator_index:
+                self.excavator_index.insert(excavator, excavator.position)
+                self.excavator_index.follow(excavator.engine)
+        available = set(available_excavators)
+
         for letter, target_pos in self.target_letters.items():
-            if not available_excavators:
+            if not available:
                 break
-                
-            nearest_excavator = min(
-                available_excavators,
-                key=lambda e: self.calculate_distance(e.position, target_pos)
-            )
+
+            # Nearest by Manhattan distance, ties going to the excavator added first
+            nearest_excavator = self.excavator_index.nearest(target_pos, accept=available.__contains__)[0]
             
             task = {
                 'excavator': nearest_excavator,
@@ -55,7 +84,7 @@ class Controller(Robot):
             
             nearest_excavator.set_task(task)
             
-            available_excavators.remove(nearest_excavator)
+            available.discard(nearest_excavator)
             
         return tasks
         
@@ -102,13 +131,8 @@ class Controller(Robot):
     
     def _assign_hungarian(self, available_excavators):
         tasks = []
-        
-        def heuristic(excavator: Excavator, target):
-            excavator.set_task({'target_letter': target[0], 'target_position': target[1]})
-            return len(excavator.find_path())
 
-
-        cost_matrix = np.array([[heuristic(excavator, target) for target in self.target_letters.items()] for excavator in available_excavators])
+        cost_matrix = self.path_length_matrix(available_excavators, list(self.target_letters.items()))
 
         row_ind, col_ind = linear_sum_assignment(cost_matrix)
         for excavator_index, letter_index in zip(row_ind, col_ind):
@@ -125,55 +149,312 @@ class Controller(Robot):
     
     def _assign_bid_algorithm(self, available_excavators):
         tasks = []
-        unassigned_targets = list(self.target_letters.items())
-        
-        prices = {target[0]: 0 for target in unassigned_targets}
-        
-        while unassigned_targets and available_excavators:
-            bids = {}
-            
-            for excavator in available_excavators:
-                best_bid = float('inf')
-                best_target = None
-                
-                for target in unassigned_targets:
-                    excavator.set_task({'target_letter': target[0], 'target_position': target[1]})
-                    path = excavator.find_path()
-                    cost = len(path) if path else float('inf')
-                    
-                    bid = cost - prices[target[0]]
-                    
-                    if bid < best_bid:
-                        best_bid = bid
-                        best_target = target
-                
-                if best_target:
-                    bids[excavator] = (best_target, best_bid)
-            
-            if not bids:
+        targets = list(self.target_letters.items())
+        if not targets or not available_excavators:
+            return tasks
+
+        # Path lengths are computed once; unreachable targets are never assigned
+        path_lengths = self.path_length_matrix(available_excavators, targets)
+        cost_matrix = np.where(path_lengths > 0, path_lengths, np.inf)
+
+        row_ind, col_ind, _ = auction(cost_matrix)
+        for excavator_index, letter_index in zip(row_ind, col_ind):
+            task = {
+                'excavator': available_excavators[excavator_index],
+                'target_letter': targets[letter_index][0],
+                'target_position': targets[letter_index][1]
+            }
+            tasks.append(task)
+
+            available_excavators[excavator_index].set_task(task)
+
+        return tasks
+
+    def _assign_sparse(self, available_excavators, k=8, pool_factor=4):
+        """
+        Assignment on a sparse cost matrix. Every excavator keeps its k cheapest targets out
+        of the pool_factor * k nearest ones (Manhattan distance), and every target its k
+        cheapest excavators likewise. Excavators or targets on the smaller side that are
+        left without a partner get twice as many candidates, until they have been offered
+        every counterpart.
+        :param k: Initial number of candidates per excavator and per target
+        :param pool_factor: Size of the spatial pre-filter relative to k
+        """
+        tasks = []
+        targets = list(self.target_letters.items())
+        if not targets or not available_excavators:
+            return tasks
+
+        n_excavators, n_targets = len(available_excavators), len(targets)
+        excavator_positions = [e.position for e in available_excavators]
+        target_positions = [t[1] for t in targets]
+        excavator_tree, target_tree = cKDTree(excavator_positions), cKDTree(target_positions)
+        excavator_k = [min(k, n_targets)] * n_excavators
+        target_k = [min(k, n_excavators)] * n_targets
+        lengths = {}  # (excavator index, target index) -> path length, 0 if unreachable
+        candidates = set()
+        widen_excavators, widen_targets = range(n_excavators), range(n_targets)
+        while True:
+            for i in widen_excavators:
+                _, nearest = target_tree.query(excavator_positions[i], k=range(1, min(pool_factor * excavator_k[i], n_targets) + 1), p=1)
+                candidates.update(self._cheapest([(i, j) for j in nearest], excavator_k[i], lengths, available_excavators, target_positions))
+            for j in widen_targets:
+                _, nearest = excavator_tree.query(target_positions[j], k=range(1, min(pool_factor * target_k[j], n_excavators) + 1), p=1)
+                candidates.update(self._cheapest([(i, j) for i in nearest], target_k[j], lengths, available_excavators, target_positions))
+
+            row_ind, col_ind = self._sparse_matching(candidates, lengths, n_excavators, n_targets)
+            widen_excavators, widen_targets = [], []
+            if n_excavators <= n_targets:
+                widen_excavators = sorted(set(range(n_excavators)) - set(row_ind.tolist()))
+                widen_excavators = [i for i in widen_excavators if excavator_k[i] < n_targets]
+            if n_targets <= n_excavators:
+                widen_targets = sorted(set(range(n_targets)) - set(col_ind.tolist()))
+                widen_targets = [j for j in widen_targets if target_k[j] < n_excavators]
+            if not widen_excavators and not widen_targets:
                 break
-            
-            best_excavator = min(bids.items(), key=lambda x: x[1][1])[0]
-            best_target, best_bid = bids[best_excavator]
-            
-            prices[best_target[0]] += best_bid
-            
+            for i in widen_excavators:
+                excavator_k[i] = min(2 * excavator_k[i], n_targets)
+            for j in widen_targets:
+                target_k[j] = min(2 * target_k[j], n_excavators)
+
+        for excavator_index, letter_index in zip(row_ind, col_ind):
             task = {
-                'excavator': best_excavator,
-                'target_letter': best_target[0],
-                'target_position': best_target[1]
+                'excavator': available_excavators[excavator_index],
+                'target_letter': targets[letter_index][0],
+                'target_position': targets[letter_index][1]
             }
             tasks.append(task)
-            
-            available_excavators.remove(best_excavator)
-            unassigned_targets.remove(best_target)
-            
-            best_excavator.set_task(task)
-        
+
+            available_excavators[excavator_index].set_task(task)
+
+        return tasks
+
+    def _cheapest(self, pairs, k, lengths, excavators, target_positions):
+        """
+        Score candidate pairs not scored before and keep the k cheapest reachable ones
+        :param pairs: List of (excavator index, target index) tuples
+        :param lengths: Dictionary of path lengths of scored pairs, updated in place
+        """
+        for i, j in pairs:
+            if (i, j) not in lengths:
+                lengths[i, j] = self.path_length_to(excavators[i], target_positions[j])
+        return sorted((pair for pair in pairs if lengths[pair]), key=lengths.get)[:k]
+
+    @staticmethod
+    def _sparse_matching(candidates, lengths, n_excavators, n_targets):
+        """
+        Matching of candidate pairs that leaves out as few excavators and targets as
+        possible, with the smallest total path length among those
+        :param candidates: Set of reachable (excavator index, target index) pairs
+        :param lengths: Dictionary mapping pairs to path lengths
+        :return: (row_ind, col_ind) arrays of matched excavator and target indices
+        """
+        reachable = sorted(candidates)
+        # Excavator i may take dummy target n_targets + i and target j dummy excavator
+        # n_excavators + j, at a penalty above any total path length. The dummies of a
+        # matched pair are linked to each other, so a full matching always exists.
+        penalty = (max(lengths.values(), default=0) + 1) * (min(n_excavators, n_targets) + 1)
+        size = n_excavators + n_targets
+        rows = ([i for i, _ in reachable] + list(range(n_excavators))
+                + [n_excavators + j for j in range(n_targets)] + [n_excavators + j for _, j in reachable])
+        cols = ([j for _, j in reachable] + [n_targets + i for i in range(n_excavators)]
+                + list(range(n_targets)) + [n_targets + i for i, _ in reachable])
+        weights = [lengths[pair] for pair in reachable] + [penalty] * size + [1] * len(reachable)
+        row_ind, col_ind = min_weight_full_bipartite_matching(csr_matrix((weights, (rows, cols)), shape=(size, size)))
+        keep = (row_ind < n_excavators) & (col_ind < n_targets)
+        return row_ind[keep], col_ind[keep]
+
+    def _assign_tour(self, available_excavators):
+        """
+        Give every excavator an ordered tour of targets, so that all targets get handed
+        out even when they outnumber the excavators. Tours minimise the time until the
+        last target is reached, counted in move() calls: an excavator needs one more
+        move than its path has cells to finish a target, then starts on the next one.
+        :return: List of all tasks handed out, in tour order per excavator
+        """
+        tasks = []
+        targets = list(self.target_letters.items())
+        if not targets or not available_excavators:
+            return tasks
+
+        path_lengths = self.path_length_matrix(available_excavators, targets)
+        start_costs = np.where(path_lengths > 0, path_lengths + 1, np.inf)
+        distances = self.target_distance_matrix(available_excavators[0].maze, [t[1] for t in targets])
+        leg_costs = np.where(distances >= 0, distances + 2, np.inf)
+
+        for excavator, tour in zip(available_excavators, plan_tours(start_costs, leg_costs)):
+            if not tour:
+                continue
+            tour_tasks = [{
+                'excavator': excavator,
+                'target_letter': targets[letter_index][0],
+                'target_position': targets[letter_index][1]
+            } for letter_index in tour]
+            tasks.extend(tour_tasks)
+
+            excavator.set_tour(tour_tasks)
+
+        return tasks
+
+    def target_distance_matrix(self, maze, positions):
+        """
+        Walking distances between all pairs of targets. The last matrix is kept and
+        reused until the targets or the maze change.
+        :param maze: 2D list representing the maze
+        :param positions: List of (x, y) target positions
+        :return: NumPy array (targets x targets), -1 where unreachable
+        """
+        key = (GridMap.of(maze).version, tuple(positions))
+        if self.target_distances is not None and self.target_distances[:2] == key:
+            return self.target_distances[2]
+        if self.wavefront is not None:
+            distances = self.wavefront.distance_matrix(positions, positions)
+        else:
+            fields = self.distance_fields if self.distance_fields is not None else DistanceFieldCache()
+            distances = np.array([[fields.distance(maze, start, target) for target in positions] for start in positions])
+        self.target_distances = key + (distances,)
+        return distances
+
+    def _assign_online(self):
+        """
+        Bring the kept assignment up to date with the current excavators and targets,
+        one incremental event per new excavator or target, and hand out the tasks that changed;
+        excavators that lost their letter drop their target, path and queued tasks
+        :return: List of new tasks, including those of busy excavators that were reassigned
+        """
+        if self.online_assignment is None:
+            self.online_assignment = OnlineAssignment()
+        online = self.online_assignment
+        previous = online.assignment()
+
+        known_targets = [(letter, self.target_letters[letter]) for letter in online.tasks if letter is not None]
+        for excavator in self.excavators:
+            if excavator not in online.agents:
+                lengths = self.path_length_matrix([excavator], known_targets)[0]
+                online.add_agent(excavator, {target[0]: length for target, length in zip(known_targets, lengths) if length})
+        known_excavators = [excavator for excavator in online.agents if excavator is not None]
+        for letter, target_pos in self.target_letters.items():
+            if letter not in online.tasks:
+                lengths = self.path_length_matrix(known_excavators, [(letter, target_pos)])[:, 0]
+                online.add_task(letter, {excavator: length for excavator, length in zip(known_excavators, lengths) if length})
+
+        tasks = []
+        assignment = online.assignment()
+        for excavator in previous:
+            if excavator not in assignment:
+                # The new solution leaves it without a letter, so it must stop going for the old one
+                excavator.task_queue.clear()
+                excavator.path = []
+                excavator.release_target()
+        for excavator, letter in assignment.items():
+            if previous.get(excavator) != letter:
+                task = {
+                    'excavator': excavator,
+                    'target_letter': letter,
+                    'target_position': self.target_letters[letter]
+                }
+                tasks.append(task)
+                excavator.set_task(task)
+        online.commit()
         return tasks
 
+    def complete_target(self, letter):
+        """
+        Remove a target that has been dealt with; in online mode the excavator that had it
+        becomes free and its costs are recomputed from where it stands now
+        :param letter: Letter of the completed target
+        """
+        target_pos = self.target_letters.pop(letter)
+        if self.online_assignment is not None and letter in self.online_assignment.tasks:
+            online = self.online_assignment
+            excavator = next((e for e, l in online.assignment().items() if l == letter), None)
+            online.remove_task(letter)
+            if excavator is not None:
+                targets = [(l, self.target_letters[l]) for l in online.tasks if l is not None]
+                lengths = self.path_length_matrix([excavator], targets)[0]
+                online.update_agent(excavator, {target[0]: length for target, length in zip(targets, lengths) if length})
+        self.command_history.append({
+            'type': 'complete_target',
+            'target_letter': letter,
+            'target_position': target_pos
+        })
+
+    def remove_excavator(self, excavator):
+        self.excavators.remove(excavator)
+        if excavator in self.excavator_index:
+            self.excavator_index.remove(excavator)
+        if self.online_assignment is not None and excavator in self.online_assignment.agents:
+            self.online_assignment.remove_agent(excavator)
+        self.command_history.append({
+            'type': 'remove_excavator',
+            'excavator_id': excavator.robot_id
+        })
+
     def get_command_history(self):
-        return self.command_history
+        return self.command_history.to_list()
+
+    def set_distance_fields(self, distance_fields):
+        """
+        Share a DistanceFieldCache with the controller and all its excavators
+        :param distance_fields: DistanceFieldCache instance, or None to go back to path searches
+        """
+        self.distance_fields = distance_fields
+        for excavator in self.excavators:
+            excavator.set_distance_fields(distance_fields)
+
+    def set_wavefront(self, wavefront):
+        """
+        Build path length matrices with a batched WavefrontBFS instead of one search per pair
+        :param wavefront: WavefrontBFS instance on the excavators' maze, or None
+        """
+        self.wavefront = wavefront
+
+    def set_cost_pool(self, cost_pool):
+        """
+        Build path length matrices in worker processes, one row per excavator; used by
+        every path-based assignment method unless a wavefront is set
+        :param cost_pool: CostMatrixPool instance on the excavators' maze, or None
+        """
+        self.cost_pool = cost_pool
+
+    def path_length_matrix(self, excavators, targets):
+        """
+        Path lengths from every excavator to every target; the excavators' tasks and
+        histories are left untouched
+        :param excavators: List of excavators
+        :param targets: List of (letter, position) tuples
+        :return: NumPy array with one row per excavator and one column per target, 0 where unreachable
+        """
+        if not excavators or not targets:
+            return np.zeros((len(excavators), len(targets)), dtype=int)
+        if self.wavefront is not None:
+            distances = self.wavefront.distance_matrix([e.position for e in excavators], [t[1] for t in targets])
+            return np.where(distances >= 0, distances + 1, 0)
+        if self.cost_pool is not None:
+            return self.cost_pool.path_length_matrix(excavators, targets, self.distance_fields is not None)
+        return np.array([[self.path_length_to(excavator, target[1]) for target in targets] for excavator in excavators])
+
+    def path_length(self, excavator):
+        """
+        Length of the path from an excavator to its current target, as len(excavator.find_path())
+        :param excavator: Excavator with a target set
+        :return: Number of cells on the path, 0 if the target is unreachable
+        """
+        if excavator.target is None:
+            return 0
+        return self.path_length_to(excavator, excavator.target)
+
+    def path_length_to(self, excavator, position):
+        """
+        Length of the path from an excavator to any position, without side effects on the excavator
+        :param excavator: Excavator to score
+        :param position: (x, y) tuple of the destination
+        :return: Number of cells on the path, 0 if the position is unreachable
+        """
+        if self.distance_fields is not None:
+            distance = self.distance_fields.distance(excavator.maze, excavator.position, position)
+            return distance + 1 if distance >= 0 else 0
+        return len(excavator.path_to(position))
 
 
     def calculate_distance(self, pos1, pos2):
@@ -1,19 +1,45 @@
+from collections import deque
 from robot import Robot
-from search_algorithms import BFSFinder, AStarFinder, DijkstraFinder, GBFSFinder, DFSFinder
+from history import History
+from simulation import SimulationEngine
+from search_algorithms import BFSFinder, AStarFinder, DijkstraFinder, GBFSFinder, DFSFinder, BidirectionalBFSFinder, BidirectionalAStarFinder, JPSFinder, JunctionGraphFinder, HPAStarFinder, DStarLiteFinder
 
 class Excavator(Robot):
-    def __init__(self, position, robot_id):
+    def __init__(self, position, robot_id, engine=None):
+        """
+        :param position: (x, y) tuple of the starting position
+        :param robot_id: Unique identifier for the excavator
+        :param engine: SimulationEngine holding the position and path of the excavator;
+            excavators that share one can all be moved at once with engine.step()
+        """
+        self.engine = engine if engine is not None else SimulationEngine(capacity=1)
+        self.slot = self.engine.add(self, position)
         super().__init__(position, robot_id)
         self.id = robot_id
         self.target = None
         self.path = []
         self.has_target = False
-        self.mission_history = []
+        self.mission_history = History()
         self.explored_nodes = []
         self.maze = None
         self.path_finder = None
+        self.scoring_finder = None  # Stateless finder for path_to when the path finder is incremental
+        self.distance_fields = None
+        self.task_queue = deque()  # Tasks still to do after the current one
         
     def set_task(self, task):
+        self.task_queue.clear()
+        self._start_task(task)
+
+    def set_tour(self, tasks):
+        """
+        Give the excavator a sequence of tasks; the next one starts as soon as the previous target is reached
+        :param tasks: Non-empty list of tasks in the order they should be done
+        """
+        self.set_task(tasks[0])
+        self.task_queue.extend(tasks[1:])
+
+    def _start_task(self, task):
         self.target = task['target_position']
         self.path = []
         self.mission_history.append({
@@ -23,35 +49,119 @@ class Excavator(Robot):
         })
         self.has_target = True
 
+    @property
+    def position(self):
+        return self.engine.position(self.slot)
+
+    @position.setter
+    def position(self, new_position):
+        self.engine.positions[self.slot] = new_position
+        for listener in self.position_listeners:
+            listener.on_position_changed(self, new_position)
+        self.engine.positions_changed([self.slot])
+
+    @property
+    def path(self):
+        """
+        Remaining path as a new list; assign to replace it
+        """
+        return self.engine.path(self.slot)
+
+    @path.setter
+    def path(self, path):
+        self.engine.set_path(self.slot, path)
+
+    @property
+    def path_length(self):
+        """
+        Number of cells left on the path, without copying it
+        """
+        return self.engine.path_length(self.slot)
+
+    @property
+    def has_target(self):
+        return bool(self.engine.has_target[self.slot])
+
+    @has_target.setter
+    def has_target(self, has_target):
+        self.engine.has_target[self.slot] = has_target
+
 
     def set_maze(self, maze):
         self.maze = maze
+
+    def set_distance_fields(self, distance_fields):
+        """
+        Answer path queries from a shared DistanceFieldCache instead of the path finder
+        :param distance_fields: DistanceFieldCache instance, or None to use the path finder again
+        """
+        self.distance_fields = distance_fields
         
-    def set_path_finder(self, path_finder):
+    def set_path_finder(self, path_finder, path_cache=None):
         if path_finder == "BFS":
-            self.path_finder = BFSFinder(self.maze)
+            self.path_finder = BFSFinder(self.maze, path_cache)
         elif path_finder == "AStar":
-            self.path_finder = AStarFinder(self.maze)
+            self.path_finder = AStarFinder(self.maze, path_cache)
         elif path_finder == "Dijkstra":
-            self.path_finder = DijkstraFinder(self.maze)
+            self.path_finder = DijkstraFinder(self.maze, path_cache)
         elif path_finder == "GBFS":
-            self.path_finder = GBFSFinder(self.maze)
+            self.path_finder = GBFSFinder(self.maze, path_cache)
         elif path_finder == "DFS":
-            self.path_finder = DFSFinder(self.maze)
+            self.path_finder = DFSFinder(self.maze, path_cache)
+        elif path_finder == "BidirectionalBFS":
+            self.path_finder = BidirectionalBFSFinder(self.maze, path_cache)
+        elif path_finder == "BidirectionalAStar":
+            self.path_finder = BidirectionalAStarFinder(self.maze, path_cache)
+        elif path_finder == "JPS":
+            self.path_finder = JPSFinder(self.maze, path_cache)
+        elif path_finder == "JunctionGraph":
+            self.path_finder = JunctionGraphFinder(self.maze, path_cache)
+        elif path_finder == "HPA":
+            self.path_finder = HPAStarFinder(self.maze, path_cache)
+        elif path_finder == "DStarLite":
+            self.path_finder = DStarLiteFinder(self.maze, path_cache)
         
     def find_path(self):
         """
         Find path to target using the path finder
         :return: List of positions representing the path to target
         """
+        if self.target is None:
+            return []
+        if self.distance_fields is not None:
+            return self.distance_fields.path(self.maze, self.position, self.target)
         return self.path_finder.find_path(self.position, self.target)
 
+    def path_to(self, position):
+        """
+        Find a path from the current position to any position, leaving the task and the
+        mission history untouched; used to score candidate targets. An incremental path
+        finder keeps the state of its own target, and an A* finder, which returns paths of
+        the same length, answers instead.
+        :param position: (x, y) tuple of the destination
+        :return: List of positions representing the path, [] if unreachable
+        """
+        if self.distance_fields is not None:
+            return self.distance_fields.path(self.maze, self.position, position)
+        finder = self.path_finder
+        if finder.incremental:
+            if self.scoring_finder is None or self.scoring_finder.maze is not finder.maze:
+                self.scoring_finder = AStarFinder(finder.maze, finder.path_cache)
+            finder = self.scoring_finder
+        return finder.find_path(self.position, position)
+
     
     def move(self):
-        if self.path:
-            next_pos = self.path[1] if len(self.path) > 1 else self.path[0]
-            self.position = next_pos
-            self.path.pop(0)  
+        # Step to the second cell of the path (or stay on the last one) and drop the first
+        self.engine.move(self.slot)
+
+    def on_path_end(self):
+        """
+        Called by the engine on a move with no path left
+        """
+        if self.task_queue:
+            self._start_task(self.task_queue.popleft())
+            self.path = self.find_path()
         else:
             self.has_target = False
         
@@ -72,4 +182,4 @@ class Excavator(Robot):
         })
 
     def get_mission_history(self):
-        return self.mission_history
\ No newline at end of file
+        return self.mission_history.to_list()
\ No newline at end of file
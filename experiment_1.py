@@ -1,8 +1,7 @@
 from Utils import generate_maze, save_maze, load_maze, find_start_position, find_valid_positions, ask_target_letters
-from visualizer import MazeVisualizer
 from controller import Controller
 from excavator import Excavator
-from matplotlib import pyplot as plt    
+from runner import simulate
 import random
 import time 
 
@@ -24,7 +23,7 @@ note_results = False
 
 if __name__ == "__main__":
     
-    path_finders = ["DFS", "BFS", "AStar", "Dijkstra", "GBFS"]
+    path_finders = ["DFS", "BFS", "AStar", "Dijkstra", "GBFS", "BidirectionalBFS", "BidirectionalAStar", "JPS", "JunctionGraph", "HPA", "DStarLite"]
     
     for path_finder in path_finders:
     
@@ -48,12 +47,15 @@ if __name__ == "__main__":
                 excavators.append(excavator)
                 controller.add_excavator(excavator)
                 
-            robots = {
-                'excavators': excavators,
-                'controller': controller
-            }
-
-            visualizer = MazeVisualizer(maze, robots)
+            observers = []
+            if show_animation:
+                from visualizer import MazeVisualizer  # matplotlib is only loaded when animating
+                robots = {
+                    'excavators': excavators,
+                    'controller': controller
+                }
+                visualizer = MazeVisualizer(maze, robots, pause_interval=0.5)
+                observers.append(visualizer)
             
             letters = ask_target_letters(letters_positions)
             print(letters)
@@ -71,22 +73,18 @@ if __name__ == "__main__":
                 end_time = time.time()
                 total_time += end_time - start_time
                 print(len(excavator.path))
+                print(f"expanded nodes: {excavator.path_finder.expanded_nodes}")
                 if note_results:
                     with open(f"./results/{path_finder}.txt", "a") as f:
                         f.write(f"maze {i}\n")
                         f.write(f"time taken: {end_time - start_time} seconds\n")
-                    f.write(f"excavator {excavator.id} path length: {len(excavator.path)}\n")
-                    f.write(f"excavator {excavator.id} path: {excavator.path}\n")
+                        f.write(f"expanded nodes: {excavator.path_finder.expanded_nodes}\n")
+                        f.write(f"excavator {excavator.id} path length: {len(excavator.path)}\n")
+                        f.write(f"excavator {excavator.id} path: {excavator.path}\n")
                     
-                while excavator.path:
-                    # print(excavator.path)
-                    visualizer.plot_maze()
-                    visualizer.plot_robots()
-                            
-                    excavator.move()
-                    if show_animation:
-                        plt.pause(0.5)
-            plt.close()
+                simulate(excavator.engine, observers)
+            if show_animation:
+                visualizer.close()
         if note_results:
             with open(f"./results/{path_finder}.txt", "a") as f:
                 f.write(f"Total time taken: {total_time} seconds\n")
@@ -1,27 +1,45 @@
-import pandas as pd
 from controller import Controller
 from excavator import Excavator
 
 from Utils import load_maze, find_start_position, find_valid_positions
+from search_algorithms import DistanceFieldCache, PathCache, WavefrontBFS
+from history import History, JsonlSink
+from parallel_costs import CostMatrixPool
+from simulation import SimulationEngine
+from multi_agent_planning import CooperativePlanner, CBSPlanner
+from conflicts_detection import ConflictMonitor
+from runner import simulate, Replanner
 import random   
 import time 
-from visualizer import MazeVisualizer
-import matplotlib.pyplot as plt
 
 random.seed(0)  
 
 number_of_excavators = 10
+number_of_letters = number_of_excavators  # More letters than excavators leaves the surplus to tour assignment
 show_animation = True
 note_results = False
+use_distance_fields = False
+use_path_cache = False
+use_wavefront = False
+use_process_pool = False
+use_cooperative_planning = False  # Plan conflict-free paths for all excavators together
+cbs_suboptimality = 1.5  # Cost bound of the 'cbs' method relative to optimal paths, 1 for optimal
+stream_histories = False
+monitor_conflicts = True  # Check every tick for region and opening conflicts while the excavators move
+stop_on_conflict = False  # End a run at the first tick with a conflict
+replan_on_conflict = False  # Replan the remaining paths of all excavators together after a tick with conflicts
+use_event_scheduler = False  # Skip ticks without arrivals; observers still see every tick
+
 
 if __name__ == "__main__":
-    task_assign_methods = ["random", "nearest", "simple_hungarian", "hungarian", "bid"]
+    task_assign_methods = ["random", "nearest", "simple_hungarian", "hungarian", "bid", "online", "tour", "cbs"]
             
     for task_assign_method in task_assign_methods:
         if note_results:
             with open(f"./results/experiment_2/{task_assign_method}.txt", "w") as f:
                 f.write("Experiment 2\n")
                 f.write(f"number of excavators: {number_of_excavators}\n")
+                f.write(f"number of letters: {number_of_letters}\n")
                 f.write(f"number of mazes: 10\n")
                 f.write(f"number of task assign methods: {len(task_assign_methods)}\n")
             
@@ -30,18 +48,34 @@ if __name__ == "__main__":
         valid_positions = find_valid_positions(maze)
         controller_start_pos = find_start_position(maze)
         excavators_start_positions = random.sample(valid_positions, number_of_excavators)   
-        letters = random.sample(letters_positions.keys(), number_of_excavators)
+        letters = random.sample(list(letters_positions.keys()), number_of_letters)
+        distance_fields = DistanceFieldCache()
+        path_cache = PathCache() if use_path_cache else None
+        cost_pool = CostMatrixPool(maze) if use_process_pool else None
         
         for task_assign_method in task_assign_methods:
             controller = Controller(controller_start_pos, "C1")   
+            engine = SimulationEngine()
+            if stream_histories:
+                # Full command and mission logs go to disk, memory only keeps the recent entries
+                history_sink = JsonlSink(f"./results/experiment_2/{task_assign_method}_history.jsonl")
+                controller.command_history = History(sink=history_sink, source=controller.robot_id)
+            if use_distance_fields:
+                controller.set_distance_fields(distance_fields)
+            if use_wavefront:
+                controller.set_wavefront(WavefrontBFS(maze))
+            if cost_pool is not None:
+                controller.set_cost_pool(cost_pool)
         
             letters_positions = {letter: letters_positions[letter] for letter in letters}
             controller.recieve_target_letter(letters_positions)
             
             for j in range(number_of_excavators):
-                excavator = Excavator(excavators_start_positions[j], f"E{j+1}")
+                excavator = Excavator(excavators_start_positions[j], f"E{j+1}", engine)
                 excavator.set_maze(maze)
-                excavator.set_path_finder("AStar")
+                excavator.set_path_finder("AStar", path_cache)
+                if stream_histories:
+                    excavator.mission_history = History(sink=history_sink, source=excavator.robot_id)
                 controller.add_excavator(excavator)
                 
             if note_results:
@@ -52,7 +86,8 @@ if __name__ == "__main__":
                     f.write(f"letters positions: {letters_positions}\n")
                 
             time_start = time.time()
-            controller.assign_tasks(task_assign_method)
+            # 'cbs' assigns like 'hungarian' and then plans all paths together with CBS
+            tasks = controller.assign_tasks("hungarian" if task_assign_method == "cbs" else task_assign_method)
             time_end = time.time()
             
             if note_results:
@@ -63,12 +98,28 @@ if __name__ == "__main__":
                         f.write(f"excavator {excavator.id} target letter: {excavator.target}\n")
                 
             time_start = time.time()    
-            for excavator in controller.excavators:
-                excavator.path = excavator.find_path()
+            planner = None
+            if task_assign_method == "cbs":
+                planner = CBSPlanner(maze, suboptimality=cbs_suboptimality)
+            elif use_cooperative_planning:
+                planner = CooperativePlanner(maze)
+            if planner is not None:
+                paths = planner.plan([excavator.position for excavator in controller.excavators],
+                                     [excavator.target if excavator.has_target else None for excavator in controller.excavators])
+                for excavator, path in zip(controller.excavators, paths):
+                    excavator.path = path
+            else:
+                for excavator in controller.excavators:
+                    excavator.path = excavator.find_path()
             time_end = time.time()
             if note_results:
                 with open(f"./results/experiment_2/{task_assign_method}.txt", "a") as f:
                     f.write(f"Time for pathfinding: {time_end - time_start} seconds\n")
+                    if isinstance(planner, CBSPlanner):
+                        f.write(f"CBS nodes expanded: {planner.expanded_nodes}, generated: {planner.generated_nodes}, "
+                                f"solved: {planner.solved}\n")
+                    if path_cache is not None:
+                        f.write(f"path cache hits: {path_cache.hits}, misses: {path_cache.misses}\n")
 
             if note_results:
                 with open(f"./results/experiment_2/{task_assign_method}.txt", "a") as f:
@@ -78,25 +129,38 @@ if __name__ == "__main__":
                         f.write(f"excavator {excavator.id} path length: {len(excavator.path)}\n")
                         total_path_length += len(excavator.path)
                     f.write(f"total path length: {total_path_length}\n")
-                    
-            if show_animation:        
-                robots = {
-                    'excavators': controller.excavators,
-                    'controller': controller
-                }
-            
-            
-                visualizer = MazeVisualizer(maze, robots)
-                while True: 
-                    visualizer.plot_maze()
-                    visualizer.plot_robots()
-                    
-                    plt.pause(0.2)
-                    for excavator in controller.excavators:
-                        excavator.move()
-                    if all(not excavator.has_target for excavator in controller.excavators):
-                        break
-                plt.close()
+
+            # Completion time: moves until every excavator has finished all its targets
+            observers = []
+            monitor = None
+            if monitor_conflicts:
+                monitor = ConflictMonitor(stop_on_conflict=stop_on_conflict)
+                observers.append(monitor)
+                if replan_on_conflict:
+                    observers.append(Replanner(maze, monitor))
+            if show_animation:
+                from visualizer import MazeVisualizer  # matplotlib is only loaded when animating
+                visualizer = MazeVisualizer(maze, {'excavators': controller.excavators, 'controller': controller})
+                observers.append(visualizer)
+            completion_time = simulate(engine, observers, event_driven=use_event_scheduler)
+            if show_animation:
+                visualizer.close()
+
+            if note_results:
+                with open(f"./results/experiment_2/{task_assign_method}.txt", "a") as f:
+                    f.write(f"letters assigned: {len(tasks)} of {len(letters)}\n")
+                    f.write(f"completion time: {completion_time} moves\n")
+                    if monitor is not None:
+                        f.write(f"region conflicts: {monitor.region_conflicts}, "
+                                f"opening conflicts: {monitor.opening_conflicts}\n")
+                        if monitor.stopped:
+                            f.write(f"stopped at the first conflict, time step {monitor.time_step}\n")
+
+            if stream_histories:
+                history_sink.close()
+
+        if cost_pool is not None:
+            cost_pool.shutdown()
                     
                 
                     
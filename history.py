@@ -0,0 +1,62 @@
+from collections import deque
+import json
+
+DEFAULT_CAPACITY = 1000
+
+
+class History:
+    """
+    Fixed-capacity log of events. Once full, every new entry pushes out the oldest one;
+    an optional sink receives all entries, so a complete record can be kept on disk
+    without holding it in memory.
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY, sink=None, source=None):
+        """
+        :param capacity: Maximum number of entries kept in memory, None for no limit
+        :param sink: Optional object with a write(entry) method, e.g. a JsonlSink
+        :param source: Optional name added to every entry sent to the sink, so that one
+            sink can be shared by several robots
+        """
+        self.entries = deque(maxlen=capacity)
+        self.sink = sink
+        self.source = source
+        self.total = 0  # Entries ever appended, including those pushed out
+
+    def append(self, entry):
+        self.entries.append(entry)
+        self.total += 1
+        if self.sink is not None:
+            self.sink.write(entry if self.source is None else {'source': self.source, **entry})
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def to_list(self):
+        return list(self.entries)
+
+
+class JsonlSink:
+    """
+    Appends history entries to a file, one JSON object per line. Tuples are written as
+    lists and anything else JSON cannot represent as its string form.
+    """
+    def __init__(self, path):
+        """
+        :param path: File to append to
+        """
+        self.file = open(path, "a")
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry, default=str) + "\n")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
@@ -1,5 +1,8 @@
 from excavator import Excavator
 from controller import Controller
+from simulation import SimulationEngine
+from conflicts_detection import ConflictMonitor
+from runner import simulate
 from visualizer import MazeVisualizer
 from matplotlib import pyplot as plt
 import random
@@ -18,10 +21,13 @@ def main():
     number_of_excavators = 5
     
     controller = Controller(start_pos, "C1")
+    engine = SimulationEngine()
     excavators = []
     for i in range(number_of_excavators):
         random_position = random.choice(valid_positions)
-        excavator = Excavator(random_position, f"E{i+1}")
+        excavator = Excavator(random_position, f"E{i+1}", engine)
+        excavator.set_maze(maze)
+        excavator.set_path_finder("AStar")
         excavators.append(excavator)
         controller.add_excavator(excavator)
     
@@ -31,26 +37,31 @@ def main():
         'controller': controller
     }
     
-    visualizer = MazeVisualizer(maze, robots)
+    visualizer = MazeVisualizer(maze, robots, pause_interval=0.1)
+    # Report conflicts as soon as they happen
+    monitor = ConflictMonitor(on_conflict=lambda conflict: print(f"Conflict: {conflict}"))
     
     # Simulate search process
+    completed_letters = set()
     while letter_positions:
-        target_letters = ask_target_letters(letter_positions)
+        target_letters = {letter: position for letter, position in ask_target_letters(letter_positions).items()
+                          if letter not in completed_letters}
+        if not target_letters:
+            # Every letter asked for has been reached already
+            break
         
         controller.recieve_target_letter(target_letters)
         
         tasks = controller.assign_tasks()
         for task in tasks:
             excavator = task['excavator']
-            excavator.find_path(maze)
-            if excavator.path:
-                next_pos = excavator.path[1] if len(excavator.path) > 1 else excavator.path[0]
-                excavator.move(next_pos)
+            excavator.path = excavator.find_path()
         
-        # Update visualization
-        visualizer.plot_maze()
-        visualizer.plot_robots()
-        plt.pause(0.1)  
+        # Move every excavator one tick at a time until all targets are reached
+        simulate(engine, [monitor, visualizer])
+        for task in tasks:
+            controller.complete_target(task['target_letter'])
+            completed_letters.add(task['target_letter'])
     
     plt.show()
 
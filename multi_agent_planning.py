@@ -0,0 +1,467 @@
+import heapq
+from typing import List, Tuple
+from search_algorithms import AStarFinder, DistanceFieldCache, GridMap
+from conflicts_detection import detect_region_conflicts, detect_opening_conflicts
+
+
+class ReservationTable:
+    """
+    Cells and moves already claimed by planned paths, hashed by (cell, time step). A
+    path's last cell can stay reserved from its arrival on, for an excavator that stays
+    at its target.
+    """
+    def __init__(self, grid):
+        """
+        :param grid: GridMap of the maze
+        """
+        self.grid = grid
+        self.cells = set()  # t * size + cell
+        self.moves = set()  # (t * size + from cell) * size + to cell, for a move between t and t + 1
+        self.parked = {}  # cell -> time step from which it is taken for good
+        self.last_reserved = {}  # cell -> last time step it is reserved, parking aside
+        self.latest = 0  # Last time step with any reservation; after it only parked cells are taken
+
+    def reserve_path(self, cells, park=True):
+        """
+        :param cells: List of cell ids, one per time step starting at 0
+        :param park: Keep the last cell reserved after the path ends
+        """
+        size = self.grid.size
+        for t, cell in enumerate(cells):
+            self.cells.add(t * size + cell)
+            self.last_reserved[cell] = max(self.last_reserved.get(cell, -1), t)
+            if t and cells[t - 1] != cell:
+                self.moves.add(((t - 1) * size + cells[t - 1]) * size + cell)
+        arrival = len(cells) - 1
+        if park:
+            self.parked[cells[-1]] = arrival
+        self.latest = max(self.latest, arrival)
+
+    def is_free(self, cell, t):
+        parked = self.parked.get(cell)
+        return (parked is None or t < parked) and t * self.grid.size + cell not in self.cells
+
+    def clear(self):
+        self.cells.clear()
+        self.moves.clear()
+        self.parked.clear()
+        self.last_reserved.clear()
+        self.latest = 0
+
+
+class SpaceTimeAStarFinder(AStarFinder):
+    """
+    A* over (cell, time step) with a wait action, avoiding the cells and swaps reserved
+    in a ReservationTable. The heuristic is the exact distance of the static maze. Once
+    past the table's last time step the world no longer changes, so all later times of a
+    cell are searched as one state; this keeps the search finite when the goal cannot
+    be reached.
+
+    With a conflict_table (the paths of other excavators, as a ReservationTable that may
+    be crossed) the search becomes a focal search: it expands, fewest conflicts with
+    those paths first, any entry whose cost is within focal_weight times the lowest
+    open one, and returns a path at most focal_weight times longer than the shortest.
+    """
+    optimal = False  # Paths depend on the reservations, so a reversed path is no answer
+
+    def __init__(self, maze, reservations=None, stay_at_goal=True):
+        """
+        :param maze: 2D list representing the maze
+        :param reservations: ReservationTable to plan around; paths are not added to it
+        :param stay_at_goal: Only arrive at the goal once nobody else needs it any more
+        """
+        # No path cache: the same query has different answers under different reservations
+        super().__init__(maze)
+        self.reservations = reservations if reservations is not None else ReservationTable(self.grid)
+        self.stay_at_goal = stay_at_goal
+        self.distance_fields = DistanceFieldCache()
+        self.conflict_table = None
+        self.focal_weight = 1.0
+        self.lower_bound = 0  # Lower bound on the shortest path cost found by the last focal search
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        :return: Positions at time steps 0, 1, ... with waits as repeated positions, ending
+                 at goal (at a time from which it can stay there, with stay_at_goal); [] if
+                 there is no such path
+        """
+        if self.conflict_table is not None:
+            return self._focal_search(start, goal)
+        grid, table = self.grid, self.reservations
+        neighbors, size = grid.neighbors, grid.size
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        heuristic = self.distance_fields.get(self.maze, goal).distances
+        self.expanded_nodes = 0
+        if heuristic[source] < 0 or target in table.parked or not table.is_free(source, 0):
+            return []
+
+        cells, moves, parked = table.cells, table.moves, table.parked
+        settled = table.latest + 1
+        goal_free_from = table.last_reserved.get(target, -1) + 1 if self.stay_at_goal else 0
+        # Heap entries are (f, -t, cell, parent state); deeper entries win ties. A state
+        # is min(t, settled) * size + cell.
+        heap = [(heuristic[source], 0, source, -1)]
+        parents = {}
+        expanded = 0
+
+        while heap:
+            _, negative_t, cell, parent = heapq.heappop(heap)
+            t = -negative_t
+            state = min(t, settled) * size + cell
+            if state in parents:
+                continue
+            parents[state] = parent
+            if cell == target and t >= goal_free_from:
+                self.expanded_nodes = expanded
+                return self._trace(parents, state)
+            expanded += 1
+
+            next_t = t + 1
+            next_base = min(next_t, settled) * size
+            for neighbor in (cell,) + neighbors[cell]:
+                if next_base + neighbor in parents:
+                    continue
+                parked_from = parked.get(neighbor)
+                if parked_from is not None and next_t >= parked_from:
+                    continue
+                if next_t * size + neighbor in cells:
+                    continue
+                if neighbor != cell and (t * size + neighbor) * size + cell in moves:
+                    continue
+                heapq.heappush(heap, (next_t + heuristic[neighbor], -next_t, neighbor, state))
+
+        self.expanded_nodes = expanded
+        return []
+
+    def _focal_search(self, start, goal):
+        grid, table, soft = self.grid, self.reservations, self.conflict_table
+        neighbors, size = grid.neighbors, grid.size
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        heuristic = self.distance_fields.get(self.maze, goal).distances
+        self.expanded_nodes = 0
+        self.lower_bound = 0
+        if heuristic[source] < 0 or target in table.parked or not table.is_free(source, 0):
+            return []
+
+        cells, moves, parked = table.cells, table.moves, table.parked
+        soft_cells, soft_moves, soft_parked = soft.cells, soft.moves, soft.parked
+        settled = max(table.latest, soft.latest) + 1
+        goal_free_from = table.last_reserved.get(target, -1) + 1 if self.stay_at_goal else 0
+        weight = self.focal_weight
+        # open holds every entry as (f, -t, cell, parent state) for the lowest cost; the
+        # entries within the bound sit in focal as (conflicts, f, -t, cell, parent
+        # state), the others wait in pending as (f, conflicts, -t, cell, parent state)
+        lowest = heuristic[source]
+        open_entries = [(lowest, 0, source, -1)]
+        focal = [(0, lowest, 0, source, -1)]
+        pending = []
+        parents = {}
+        expanded = 0
+
+        while True:
+            while open_entries and min(-open_entries[0][1], settled) * size + open_entries[0][2] in parents:
+                heapq.heappop(open_entries)
+            if not open_entries:
+                break
+            if open_entries[0][0] > lowest:
+                lowest = open_entries[0][0]
+                while pending and pending[0][0] <= weight * lowest:
+                    f, conflicts, negative_t, cell, parent = heapq.heappop(pending)
+                    heapq.heappush(focal, (conflicts, f, negative_t, cell, parent))
+
+            conflicts, _, negative_t, cell, parent = heapq.heappop(focal)
+            t = -negative_t
+            state = min(t, settled) * size + cell
+            if state in parents:
+                continue
+            parents[state] = parent
+            if cell == target and t >= goal_free_from:
+                self.expanded_nodes = expanded
+                self.lower_bound = lowest
+                return self._trace(parents, state)
+            expanded += 1
+
+            next_t = t + 1
+            next_base = min(next_t, settled) * size
+            for neighbor in (cell,) + neighbors[cell]:
+                if next_base + neighbor in parents:
+                    continue
+                parked_from = parked.get(neighbor)
+                if parked_from is not None and next_t >= parked_from:
+                    continue
+                if next_t * size + neighbor in cells:
+                    continue
+                if neighbor != cell and (t * size + neighbor) * size + cell in moves:
+                    continue
+                next_conflicts = conflicts
+                parked_from = soft_parked.get(neighbor)
+                if (parked_from is not None and next_t >= parked_from) or next_t * size + neighbor in soft_cells:
+                    next_conflicts += 1
+                if neighbor != cell and (t * size + neighbor) * size + cell in soft_moves:
+                    next_conflicts += 1
+                f = next_t + heuristic[neighbor]
+                heapq.heappush(open_entries, (f, -next_t, neighbor, state))
+                if f <= weight * lowest:
+                    heapq.heappush(focal, (next_conflicts, f, -next_t, neighbor, state))
+                else:
+                    heapq.heappush(pending, (f, next_conflicts, -next_t, neighbor, state))
+
+        self.expanded_nodes = expanded
+        return []
+
+    def _trace(self, parents, state):
+        size, position = self.grid.size, self.grid.position
+        path = []
+        while state >= 0:
+            path.append(position(state % size))
+            state = parents[state]
+        path.reverse()
+        return path
+
+
+class CooperativePlanner:
+    """
+    Prioritised planning: excavators are planned one after another with space-time A*,
+    each around the paths of those before it, so no two paths meet in a cell (region
+    conflict) or swap cells (opening conflict). When some excavator finds no path, the
+    plan is redone with the excavators that failed moved to the front of the order.
+    """
+    def __init__(self, maze, stay_at_goal=True, max_restarts=5):
+        """
+        :param maze: 2D list representing the maze
+        :param stay_at_goal: Excavators keep their last cell after their path ends; if
+            False a finished path no longer blocks anything, as in conflicts_detection
+        :param max_restarts: Number of times the order may be changed after failures
+        """
+        self.maze = maze
+        self.stay_at_goal = stay_at_goal
+        self.max_restarts = max_restarts
+        self.failed = []  # Indices of the excavators the last plan() found no path for
+
+    def plan(self, starts, goals):
+        """
+        :param starts: List of (x, y) start positions, all different
+        :param goals: List of (x, y) goal positions in priority order, None for an excavator
+                      without a target, which stays where it is
+        :return: List of paths, one per excavator: positions at time steps 0, 1, ...,
+                 [] for excavators without a target or without a conflict-free path
+        """
+        order = [index for index, goal in enumerate(goals) if goal is not None]
+        best = None
+        for _ in range(self.max_restarts + 1):
+            paths, failed = self._plan_in_order(starts, goals, order)
+            if best is None or len(failed) < len(best[1]):
+                best = (paths, failed)
+            if not failed:
+                break
+            order = failed + [index for index in order if index not in failed]
+        paths, self.failed = best
+        return paths
+
+    def _plan_in_order(self, starts, goals, order):
+        grid = GridMap.of(self.maze)
+        reservations = ReservationTable(grid)
+        finder = SpaceTimeAStarFinder(self.maze, reservations, self.stay_at_goal)
+        paths = [[] for _ in starts]
+        failed = []
+        for start, goal in zip(starts, goals):
+            if goal is None:
+                reservations.reserve_path([grid.cell_id(*start)])
+        for index in order:
+            path = finder.find_path(starts[index], goals[index])
+            if path:
+                paths[index] = path
+                reservations.reserve_path([grid.cell_id(*position) for position in path], self.stay_at_goal)
+            else:
+                # The excavator stays at its start, in the way of those planned after it
+                failed.append(index)
+                reservations.reserve_path([grid.cell_id(*starts[index])], self.stay_at_goal)
+        return paths, failed
+
+
+class CBSPlanner:
+    """
+    Conflict-Based Search: paths with no region or opening conflicts (as defined in
+    conflicts_detection) and the lowest sum of arrival times. The high level is a search
+    over constraint sets; every node holds one path per excavator that obeys that
+    excavator's constraints, found with SpaceTimeAStarFinder, which prefers paths that
+    conflict least with those of the other excavators. The earliest conflict of a node
+    is resolved by two children, one forbidding the cell or move to each excavator
+    involved.
+
+    With a suboptimality factor w > 1 this is Enhanced CBS: both the low level and the
+    high level are focal searches that pick, fewest conflicts first, among the entries
+    within w times a lower bound on the optimal cost. The result costs at most w times
+    the optimum but is usually found in far fewer nodes.
+
+    The paths of a CooperativePlanner serve as an incumbent: the search stops as soon as
+    they are within the bound of the lowest open node, and they are returned when the
+    node limit is reached. Meant for small fleets.
+    """
+    def __init__(self, maze, suboptimality=1.0, stay_at_goal=True, max_nodes=5000):
+        """
+        :param maze: 2D list representing the maze
+        :param suboptimality: Bound w on the cost relative to the optimum, 1 for optimal paths
+        :param stay_at_goal: Excavators keep their last cell after their path ends
+        :param max_nodes: Maximum number of high-level nodes to expand
+        """
+        self.maze = maze
+        self.suboptimality = suboptimality
+        self.stay_at_goal = stay_at_goal
+        self.max_nodes = max_nodes
+        self.expanded_nodes = 0  # High-level nodes expanded by the last plan()
+        self.generated_nodes = 0  # High-level nodes created by the last plan()
+        self.solved = False  # Whether the last plan() finished within max_nodes
+        self.failed = []  # Indices of the excavators without a path
+
+    def plan(self, starts, goals):
+        """
+        :param starts: List of (x, y) start positions, all different
+        :param goals: List of (x, y) goal positions, None for an excavator without a
+                      target, which stays where it is
+        :return: List of paths, one per excavator: positions at time steps 0, 1, ...,
+                 [] for excavators without a target or whose target is unreachable
+        """
+        grid = GridMap.of(self.maze)
+        finder = SpaceTimeAStarFinder(self.maze, stay_at_goal=self.stay_at_goal)
+        finder.focal_weight = self.suboptimality
+        self.expanded_nodes = 0
+        self.generated_nodes = 1
+        self.solved = False
+
+        # Excavators without a target, and those the low level finds no path for, never
+        # move; the others plan around them as hard reservations, since no constraint on
+        # a fixed excavator could resolve a conflict with it
+        fixed = {index: [start] for index, (start, goal) in enumerate(zip(starts, goals)) if goal is None}
+        self.failed = []
+        while True:
+            paths, bounds, failed = {}, {}, []
+            for index, (start, goal) in enumerate(zip(starts, goals)):
+                if index in fixed:
+                    continue
+                path, bound = self._low_level(finder, grid, start, goal, (), paths, fixed)
+                if path:
+                    paths[index], bounds[index] = path, bound
+                else:
+                    failed.append(index)
+            if not failed:
+                break
+            # Plan the others again, now around the failed ones standing at their starts
+            for index in failed:
+                fixed[index] = [starts[index]]
+            self.failed += failed
+
+        cooperative = CooperativePlanner(self.maze, self.stay_at_goal)
+        incumbent = cooperative.plan(starts, goals)
+        incumbent_cost = None
+        # The cooperative plan only avoids a failed excavator after it failed, so it may pass through it
+        if set(cooperative.failed) == set(self.failed) and not self._conflicts(
+                {**fixed, **{index: path for index, path in enumerate(incumbent) if path}}):
+            incumbent_cost = sum(len(path) - 1 for path in incumbent if path)
+
+        open_nodes = [self._node(paths, bounds, {}, fixed, 0)]
+        while open_nodes and self.expanded_nodes < self.max_nodes:
+            lower_bound = min(sum(node[4].values()) for node in open_nodes)
+            if incumbent_cost is not None and incumbent_cost <= self.suboptimality * lower_bound:
+                self.solved = True
+                return incumbent
+            _, _, _, paths, bounds, constraints, conflict = self._pop(open_nodes, lower_bound)
+            if conflict is None:
+                self.solved = True
+                return [paths.get(index, []) for index in range(len(starts))]
+            self.expanded_nodes += 1
+            if any(excavator in fixed for excavator in conflict['excavators']):
+                # No constraint can move a fixed excavator, so this node has no solution
+                continue
+
+            for excavator, constraint in self._split(conflict):
+                child_constraints = dict(constraints)
+                child_constraints[excavator] = constraints.get(excavator, ()) + (constraint,)
+                others = {index: path for index, path in paths.items() if index != excavator}
+                path, bound = self._low_level(finder, grid, starts[excavator], goals[excavator],
+                                              child_constraints[excavator], others, fixed)
+                if not path:
+                    continue
+                self.generated_nodes += 1
+                child = self._node({**paths, excavator: path}, {**bounds, excavator: bound},
+                                   child_constraints, fixed, self.generated_nodes)
+                heapq.heappush(open_nodes, child)
+
+        self.failed = cooperative.failed
+        return incumbent
+
+    def _pop(self, open_nodes, lower_bound):
+        if self.suboptimality <= 1:
+            return heapq.heappop(open_nodes)
+        # Focal search: fewest conflicts among the nodes costing at most w times the lowest bound
+        bound = self.suboptimality * lower_bound
+        position = min((i for i, node in enumerate(open_nodes) if node[0] <= bound),
+                       key=lambda i: (open_nodes[i][1], open_nodes[i][0], open_nodes[i][2]))
+        node = open_nodes[position]
+        open_nodes[position] = open_nodes[-1]
+        open_nodes.pop()
+        heapq.heapify(open_nodes)
+        return node
+
+    def _node(self, paths, bounds, constraints, fixed, node_id):
+        """
+        :return: Tuple (sum of costs, number of conflicts, node id, paths, lower bounds,
+                 constraints, earliest conflict)
+        """
+        conflicts = self._conflicts({**fixed, **paths})
+        earliest = min(conflicts, key=lambda conflict: conflict['time_step']) if conflicts else None
+        cost = sum(len(path) - 1 for path in paths.values())
+        return cost, len(conflicts), node_id, paths, bounds, constraints, earliest
+
+    def _conflicts(self, paths):
+        if self.stay_at_goal:
+            # Excavators wait at the end of their path until the last one arrives
+            horizon = max(len(path) for path in paths.values())
+            paths = {index: path + path[-1:] * (horizon - len(path)) for index, path in paths.items()}
+        trial = {'paths': paths}
+        return detect_region_conflicts(trial) + detect_opening_conflicts(trial)
+
+    @staticmethod
+    def _split(conflict):
+        """
+        :return: (excavator, constraint) for both children of a conflict; constraints are
+                 ('cell', position, t) or ('move', from position, to position, t) for a move
+                 between t and t + 1
+        """
+        first, second = conflict['excavators']
+        t = conflict['time_step']
+        if conflict['type'] == 'RC':
+            return [(first, ('cell', conflict['position'], t)), (second, ('cell', conflict['position'], t))]
+        previous, current = conflict['positions']
+        return [(first, ('move', previous, current, t - 1)), (second, ('move', current, previous, t - 1))]
+
+    def _low_level(self, finder, grid, start, goal, constraints, other_paths, fixed):
+        """
+        :param other_paths: Paths of the other moving excavators, avoided where the bound allows
+        :param fixed: Paths of the excavators that never move, always avoided
+        :return: (path, lower bound on its cost)
+        """
+        table = ReservationTable(grid)
+        size = grid.size
+        for path in fixed.values():
+            # Taken from time step 0 on, or only at time step 0 when finished paths block nothing
+            table.reserve_path([grid.cell_id(*path[0])], self.stay_at_goal)
+        for constraint in constraints:
+            if constraint[0] == 'cell':
+                _, position, t = constraint
+                cell = grid.cell_id(*position)
+                table.cells.add(t * size + cell)
+                table.last_reserved[cell] = max(table.last_reserved.get(cell, -1), t)
+                table.latest = max(table.latest, t)
+            else:
+                # The finder refuses a move that swaps with a reserved one, so reserve the reverse
+                _, previous, current, t = constraint
+                table.moves.add((t * size + grid.cell_id(*current)) * size + grid.cell_id(*previous))
+                table.latest = max(table.latest, t + 1)
+        conflict_table = ReservationTable(grid)
+        for path in other_paths.values():
+            conflict_table.reserve_path([grid.cell_id(*position) for position in path], self.stay_at_goal)
+        finder.reservations = table
+        finder.conflict_table = conflict_table
+        path = finder.find_path(start, goal)
+        return path, finder.lower_bound
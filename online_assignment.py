@@ -0,0 +1,232 @@
+import numpy as np
+
+
+class OnlineAssignment:
+    """
+    Minimum cost assignment of agents to tasks that is kept up to date as agents and
+    tasks come and go. The cost matrix is kept square by padding the shorter side with
+    zero cost dummy agents or tasks, and the matching is kept optimal together with its
+    Hungarian dual variables. Each event replaces one row or column of the matrix and
+    repairs the matching with a single shortest augmenting path, O(n^2) instead of the
+    O(n^3) of a full solve.
+
+    Once the current assignment has been acted on, commit() gives every assigned agent a
+    discount of switch_cost on its task, so later events only move it to another task
+    when that lowers the total cost by more than switch_cost.
+    """
+    unreachable_cost = 10 ** 9  # Dearer than any assignment made of reachable pairs only
+
+    def __init__(self, switch_cost=10):
+        """
+        :param switch_cost: Saving needed before a busy agent is given another task
+        """
+        self.switch_cost = switch_cost
+        self.agents = []  # Agent of every row, None for dummy rows
+        self.tasks = []  # Task of every column, None for dummy columns
+        self.cost = np.zeros((0, 0))
+        self.u = np.zeros(0)
+        self.v = np.zeros(0)
+        self.row_match = np.zeros(0, dtype=int)
+        self.col_match = np.zeros(0, dtype=int)
+        self.committed = np.zeros(0, dtype=int)  # Column each row has been discounted on, -1 if none
+
+    def add_agent(self, agent, costs):
+        """
+        :param agent: Hashable agent, not yet known
+        :param costs: Dictionary mapping known tasks to the agent's cost, missing or None if unreachable
+        """
+        row = self._free_slot(self.agents)
+        self.agents[row] = agent
+        self._set_row(row, self._row_costs(costs))
+        self._shrink()
+
+    def add_task(self, task, costs):
+        """
+        :param task: Hashable task, not yet known
+        :param costs: Dictionary mapping known agents to their cost for the task, missing or None if unreachable
+        """
+        column = self._free_slot(self.tasks)
+        self.tasks[column] = task
+        self._set_column(column, self._column_costs(costs))
+        self._shrink()
+
+    def update_agent(self, agent, costs):
+        """
+        Replace the costs of an agent, for example after it moved
+        :param costs: Dictionary mapping known tasks to the agent's cost
+        """
+        self._set_row(self.agents.index(agent), self._row_costs(costs))
+
+    def remove_agent(self, agent):
+        row = self.agents.index(agent)
+        self.agents[row] = None
+        self._set_row(row, np.zeros(len(self.tasks)))
+        self._shrink()
+
+    def remove_task(self, task):
+        column = self.tasks.index(task)
+        self.tasks[column] = None
+        self._set_column(column, np.zeros(len(self.agents)))
+        self._shrink()
+
+    def assignment(self):
+        """
+        :return: Dictionary mapping agents to their tasks, leaving out unassigned agents
+        """
+        result = {}
+        for row, agent in enumerate(self.agents):
+            column = self.row_match[row]
+            if agent is not None and self.tasks[column] is not None and self._true_cost(row, column) < self.unreachable_cost:
+                result[agent] = self.tasks[column]
+        return result
+
+    def total_cost(self):
+        """
+        :return: Cost of the current assignment without switch discounts
+        """
+        return sum(self._true_cost(self.agents.index(agent), self.tasks.index(task))
+                   for agent, task in self.assignment().items())
+
+    def commit(self):
+        """
+        Mark the current assignment as handed out. The switch discount of every agent
+        moves to its current task; matched pairs stay tight and no reduced cost drops, so
+        the matching stays optimal without any search.
+        """
+        for row, agent in enumerate(self.agents):
+            column = self.row_match[row]
+            committed = self.committed[row]
+            if agent is None or column == committed:
+                continue
+            if committed >= 0:
+                self.cost[row, committed] += self.switch_cost
+                self.committed[row] = -1
+            if self.tasks[column] is not None and self.cost[row, column] < self.unreachable_cost:
+                self.cost[row, column] -= self.switch_cost
+                self.u[row] -= self.switch_cost
+                self.committed[row] = column
+
+    def _true_cost(self, row, column):
+        return self.cost[row, column] + (self.switch_cost if self.committed[row] == column else 0)
+
+    def _row_costs(self, costs):
+        return np.array([self._dummy_or(costs.get(task)) if task is not None else 0 for task in self.tasks], dtype=float)
+
+    def _column_costs(self, costs):
+        return np.array([self._dummy_or(costs.get(agent)) if agent is not None else 0 for agent in self.agents], dtype=float)
+
+    def _dummy_or(self, cost):
+        return self.unreachable_cost if cost is None else cost
+
+    def _free_slot(self, slots):
+        """
+        Index of a dummy slot in the agents or tasks list, growing the matrix if there is none
+        """
+        for index, item in enumerate(slots):
+            if item is None:
+                return index
+        self._grow()
+        return len(slots) - 1
+
+    def _grow(self):
+        # New dummy row and column, both matched through one augmentation
+        n = len(self.agents)
+        self.cost = np.pad(self.cost, ((0, 1), (0, 1)))
+        self.agents.append(None)
+        self.tasks.append(None)
+        self.u = np.append(self.u, (self.cost[n, :n] - self.v).min() if n else 0)
+        self.v = np.append(self.v, (self.cost[:, n] - self.u).min())
+        self.row_match = np.append(self.row_match, -1)
+        self.col_match = np.append(self.col_match, -1)
+        self.committed = np.append(self.committed, -1)
+        self._augment(n)
+
+    def _shrink(self):
+        """
+        Drop a dummy row together with a dummy column while both exist
+        """
+        while None in self.agents and None in self.tasks:
+            row, column = self.agents.index(None), self.tasks.index(None)
+            free_row, free_column = self.col_match[column], self.row_match[row]
+            keep_rows = np.arange(len(self.agents)) != row
+            keep_columns = np.arange(len(self.tasks)) != column
+            self.cost = self.cost[keep_rows][:, keep_columns]
+            self.u, self.v = self.u[keep_rows], self.v[keep_columns]
+            del self.agents[row], self.tasks[column]
+            # Renumber the matching around the removed row and column
+            row_match, col_match = self.row_match[keep_rows], self.col_match[keep_columns]
+            committed = self.committed[keep_rows]
+            row_match[row_match > column] -= 1
+            col_match[col_match > row] -= 1
+            committed[committed > column] -= 1
+            self.row_match, self.col_match, self.committed = row_match, col_match, committed
+            if free_column != column:
+                # The removed pair was matched elsewhere; rematch the two partners left behind
+                free_row -= free_row > row
+                free_column -= free_column > column
+                self.row_match[free_row] = -1
+                self.col_match[free_column] = -1
+                if self.committed[free_row] == free_column:
+                    # The commitment is gone, so is its discount
+                    self.cost[free_row, free_column] += self.switch_cost
+                    self.committed[free_row] = -1
+                self._augment(free_row)
+
+    def _set_row(self, row, costs):
+        self.cost[row] = costs
+        self.committed[row] = -1
+        column = self.row_match[row]
+        if column >= 0:
+            self.row_match[row] = -1
+            self.col_match[column] = -1
+        self.u[row] = (self.cost[row] - self.v).min()
+        self._augment(row)
+
+    def _set_column(self, column, costs):
+        self.cost[:, column] = costs
+        self.committed[self.committed == column] = -1
+        row = self.col_match[column]
+        self.v[column] = (self.cost[:, column] - self.u).min()
+        if row >= 0:
+            self.row_match[row] = -1
+            self.col_match[column] = -1
+            self._augment(row)
+
+    def _augment(self, row):
+        """
+        Match a free row along a shortest augmenting path in reduced costs and update
+        the duals (Jonker-Volgenant step)
+        """
+        cost, u, v = self.cost, self.u, self.v
+        n = len(v)
+        distance = cost[row] - u[row] - v
+        predecessor = np.full(n, row)
+        scanned = np.zeros(n, dtype=bool)
+        order = []
+        while True:
+            column = np.where(scanned, np.inf, distance).argmin()
+            shortest = distance[column]
+            scanned[column] = True
+            order.append(column)
+            matched = self.col_match[column]
+            if matched < 0:
+                break
+            through = shortest + cost[matched] - u[matched] - v
+            better = ~scanned & (through < distance)
+            distance[better] = through[better]
+            predecessor[better] = matched
+
+        for settled in order[:-1]:
+            matched = self.col_match[settled]
+            u[matched] += shortest - distance[settled]
+            v[settled] += distance[settled] - shortest
+        u[row] += shortest
+
+        while True:
+            matched = predecessor[column]
+            previous = self.row_match[matched]
+            self.row_match[matched] = column
+            self.col_match[column] = matched
+            if matched == row:
+                break
+            column = previous
@@ -0,0 +1,105 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import numpy as np
+from search_algorithms import GridMap, DistanceFieldCache, AStarFinder
+
+# Per-process state of a worker, set once by _init_worker
+_worker_maze = None
+_worker_finders = {}
+_worker_distance_fields = None
+
+
+def _init_worker(maze):
+    """
+    Runs once in every worker process, so the maze is pickled once per worker rather
+    than once per row
+    """
+    global _worker_maze, _worker_finders, _worker_distance_fields
+    _worker_maze = maze
+    _worker_finders = {}
+    _worker_distance_fields = DistanceFieldCache()
+
+
+def _cost_row(request):
+    """
+    Path lengths from one start to every target, computed the same way as
+    Controller.path_length_to
+    :param request: (finder class or None for distance fields, finder parameters, start, target positions)
+    :return: List of path lengths, 0 where unreachable
+    """
+    finder_class, parameters, start, targets = request
+    if finder_class is None:
+        row = []
+        for target in targets:
+            distance = _worker_distance_fields.distance(_worker_maze, start, target)
+            row.append(distance + 1 if distance >= 0 else 0)
+        return row
+    key = (finder_class, tuple(sorted(parameters.items())))
+    finder = _worker_finders.get(key)
+    if finder is None:
+        finder = _worker_finders[key] = finder_class(_worker_maze, **parameters)
+    return [len(finder.find_path(start, target)) for target in targets]
+
+
+class CostMatrixPool:
+    """
+    Builds path length matrices with one row per excavator spread over a pool of worker
+    processes. Workers get the maze once when they start and keep their own path finders
+    and distance fields between calls; the pool is restarted when the maze changes.
+    """
+    def __init__(self, maze, max_workers=None, chunks_per_worker=4):
+        """
+        :param maze: 2D list representing the maze all excavators move in
+        :param max_workers: Number of worker processes, defaults to the number of CPUs
+        :param chunks_per_worker: Rows are sent in about this many batches per worker
+        """
+        self.maze = maze
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        self.executor = None
+        self._version = None
+
+    def path_length_matrix(self, excavators, targets, use_distance_fields=False):
+        """
+        :param excavators: List of excavators on this pool's maze
+        :param targets: List of (letter, position) tuples
+        :param use_distance_fields: Measure with distance fields instead of each excavator's path finder;
+            excavators that have distance fields set use them either way
+        :return: NumPy array with one row per excavator and one column per target, 0 where unreachable
+        """
+        if not excavators or not targets:
+            return np.zeros((len(excavators), len(targets)), dtype=int)
+        positions = [target[1] for target in targets]
+        requests = []
+        for excavator in excavators:
+            if use_distance_fields or excavator.distance_fields is not None:
+                requests.append((None, {}, excavator.position, positions))
+            else:
+                finder = excavator.path_finder
+                if finder.incremental:
+                    # Scored like Excavator.path_to, with A* instead of the incremental finder
+                    requests.append((AStarFinder, {}, excavator.position, positions))
+                else:
+                    requests.append((type(finder), finder.parameters(), excavator.position, positions))
+        chunksize = max(1, len(requests) // (self.max_workers * self.chunks_per_worker))
+        return np.array(list(self._executor().map(_cost_row, requests, chunksize=chunksize)))
+
+    def _executor(self):
+        version = GridMap.of(self.maze).version
+        if self.executor is not None and version != self._version:
+            self.shutdown()
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.max_workers, initializer=_init_worker, initargs=(self.maze,))
+            self._version = version
+        return self.executor
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
@@ -7,9 +7,20 @@ class Robot(ABC):
         :param position: (x, y) tuple representing the robot's position
         :param robot_id: Unique identifier for the robot
         """
+        self.position_listeners = []  # Objects with on_position_changed(robot, position), e.g. a GridIndex
         self.position = position
         self.robot_id = robot_id
         self.is_active = True
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, new_position):
+        self._position = new_position
+        for listener in self.position_listeners:
+            listener.on_position_changed(self, new_position)
         
 
     def move(self, new_position):
@@ -0,0 +1,126 @@
+import time
+from controller import Controller
+from excavator import Excavator
+from simulation import SimulationEngine, EventScheduler
+from multi_agent_planning import CooperativePlanner
+from Utils import find_start_position
+
+
+def simulate(engine, observers=(), max_ticks=None, event_driven=False, observe_every=1):
+    """
+    Step all robots of an engine until none of them has a target left. Nothing is drawn;
+    plotting, conflict checks and the like attach as observers.
+    :param engine: SimulationEngine with the robots' paths already set
+    :param observers: Objects with an on_tick(engine, tick) method, called once before the
+        first tick (tick 0) and after every tick; the run stops early when one returns True
+    :param max_ticks: Optional limit on the number of ticks
+    :param event_driven: Jump from event to event with an EventScheduler instead of
+        stepping every tick; observers are then called after ticks with events and every
+        observe_every ticks
+    :param observe_every: Ticks between observer calls in event driven runs, None for event ticks only
+    :return: Number of ticks until every robot finished, or until the run was stopped
+    """
+    if event_driven:
+        return EventScheduler(engine).run(observers, observe_every if observers else None, max_ticks)
+    ticks = 0
+    stopped = False
+    for observer in observers:
+        stopped = observer.on_tick(engine, ticks) or stopped
+    while not stopped and engine.busy() and (max_ticks is None or ticks < max_ticks):
+        engine.step()
+        ticks += 1
+        for observer in observers:
+            stopped = observer.on_tick(engine, ticks) or stopped
+    return ticks
+
+
+def replan(maze, excavators):
+    """
+    Conflict-free paths from the current positions of the excavators to their current targets;
+    an excavator the planner finds no path for, e.g. one sharing its cell with another,
+    keeps its current path
+    """
+    planner = CooperativePlanner(maze)
+    paths = planner.plan([excavator.position for excavator in excavators],
+                         [excavator.target if excavator.has_target else None for excavator in excavators])
+    for index, (excavator, path) in enumerate(zip(excavators, paths)):
+        if excavator.has_target and index not in planner.failed:
+            excavator.path = path
+
+
+class Replanner:
+    """
+    Observer that replans after every tick in which a conflict monitor found conflicts;
+    goes after the monitor in the list of observers
+    """
+    def __init__(self, maze, monitor):
+        self.maze = maze
+        self.monitor = monitor
+        self.conflicts = 0
+
+    def on_tick(self, engine, tick):
+        conflicts = self.monitor.region_conflicts + self.monitor.opening_conflicts
+        if conflicts > self.conflicts:
+            self.conflicts = conflicts
+            replan(self.maze, engine.robots)
+
+
+def run_scenario(maze, starts, letters_positions, assignment_method="nearest", path_finder="AStar",
+                 planner=None, observers=(), max_ticks=None, path_cache=None, distance_fields=None,
+                 event_driven=False):
+    """
+    Run one whole scenario headless: assign the letters to excavators placed at the given
+    starts, find their paths and move them until all targets are reached
+    :param maze: 2D list representing the maze
+    :param starts: List of (x, y) start positions, one per excavator
+    :param letters_positions: Dictionary of target letters and their positions
+    :param assignment_method: Name of a Controller.assign_tasks method
+    :param path_finder: Name of an Excavator.set_path_finder path finder
+    :param planner: Optional multi-agent planner with a plan(starts, goals) method, used instead of the path finder
+    :param observers: Objects with an on_tick(engine, tick) method, see simulate
+    :param max_ticks: Optional limit on the number of ticks
+    :param path_cache: Optional PathCache shared by the excavators' path finders
+    :param distance_fields: Optional DistanceFieldCache shared by the controller and the excavators
+    :param event_driven: Skip the ticks without events, see simulate
+    :return: Dictionary with the controller, excavators, tasks, times and path lengths of the run
+    """
+    engine = SimulationEngine(capacity=max(len(starts), 1))
+    controller = Controller(find_start_position(maze), "C1")
+    controller.recieve_target_letter(dict(letters_positions))
+    for j, start in enumerate(starts):
+        excavator = Excavator(start, f"E{j+1}", engine)
+        excavator.set_maze(maze)
+        excavator.set_path_finder(path_finder, path_cache)
+        controller.add_excavator(excavator)
+    if distance_fields is not None:
+        controller.set_distance_fields(distance_fields)
+    excavators = controller.excavators
+
+    time_start = time.perf_counter()
+    tasks = controller.assign_tasks(assignment_method)
+    assignment_time = time.perf_counter() - time_start
+
+    time_start = time.perf_counter()
+    if planner is not None:
+        paths = planner.plan([excavator.position for excavator in excavators],
+                             [excavator.target if excavator.has_target else None for excavator in excavators])
+        for excavator, path in zip(excavators, paths):
+            excavator.path = path
+    else:
+        for excavator in excavators:
+            excavator.path = excavator.find_path()
+    pathfinding_time = time.perf_counter() - time_start
+    path_lengths = [excavator.path_length for excavator in excavators]
+
+    completion_time = simulate(engine, observers, max_ticks, event_driven)
+    return {
+        'controller': controller,
+        'excavators': excavators,
+        'tasks': tasks,
+        'letters_assigned': len(tasks),
+        'assignment_time': assignment_time,
+        'pathfinding_time': pathfinding_time,
+        'path_lengths': path_lengths,
+        'total_path_length': sum(path_lengths),
+        'completion_time': completion_time,
+    }
@@ -1,4 +1,7 @@
 from robot import Robot
+from history import History
+from search_algorithms import GridMap
+from spatial_index import LetterIndex
 
 class Scout(Robot):
     def __init__(self, position, robot_id, radar_range=3):
@@ -11,7 +14,7 @@ class Scout(Robot):
         super().__init__(position, robot_id)
         self.radar_range = radar_range
         self.detected_letters = {}  # Dictionary to store detected letters and their positions
-        self.scan_history = []  # List to store historical scan results
+        self.scan_history = History()  # Changes of the most recent scans, see get_scan_history
         self.visited_positions = {position}  # Set to store visited positions
 
     def get_unvisited_moves(self, valid_moves):
@@ -37,29 +40,45 @@ class Scout(Robot):
         :return: Dictionary of detected letters and their positions
         """
 
-        self.detected_letters.clear()
         x, y = self.position
-        
+        # Buckets as wide as the radar range, so a scan looks at no more than 3 x 3 of them
+        bucket_size = max(self.radar_range, 1)
+        index = GridMap.of(maze).get_derived(('letter_index', bucket_size), lambda grid: LetterIndex(grid, bucket_size))
+
         # Scan in a square around the robot
-        for i in range(max(0, x - self.radar_range), min(len(maze), x + self.radar_range + 1)):
-            for j in range(max(0, y - self.radar_range), min(len(maze[0]), y + self.radar_range + 1)):
-                if maze[i][j].isalpha() and maze[i][j] != '#':
-                    self.detected_letters[maze[i][j]] = (i, j)
-        
-        # Record scan history
-        self.scan_history.append({
-            'position': self.position,
-            'detected_letters': self.detected_letters.copy()
-        })
-        
+        detected = {}
+        for i, j, letter in index.window(max(0, x - self.radar_range), min(len(maze) - 1, x + self.radar_range),
+                                         max(0, y - self.radar_range), min(len(maze[0]) - 1, y + self.radar_range)):
+            detected[letter] = (i, j)
+
+        # Record scan history as the change from the previous scan
+        entry = {'position': self.position}
+        lost = {letter: pos for letter, pos in self.detected_letters.items() if detected.get(letter) != pos}
+        found = {letter: pos for letter, pos in detected.items() if self.detected_letters.get(letter) != pos}
+        if lost:
+            entry['lost'] = lost
+        if found:
+            entry['found'] = found
+        self.scan_history.append(entry)
+
+        self.detected_letters.clear()
+        self.detected_letters.update(detected)
         return self.detected_letters
 
     def get_scan_history(self):
         """
-        Get the history of all scans performed
-        :return: List of scan results
+        Get the history of the most recent scans, rebuilt backwards from the latest scan
+        :return: List of scan results with the position and the detected letters of every scan
         """
-        return self.scan_history
+        results = []
+        detected = dict(self.detected_letters)
+        for entry in reversed(self.scan_history.to_list()):
+            results.append({'position': entry['position'], 'detected_letters': dict(detected)})
+            for letter in entry.get('found', ()):
+                del detected[letter]
+            detected.update(entry.get('lost', {}))
+        results.reverse()
+        return results
 
     def perform_task(self, maze):
         """
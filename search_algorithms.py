@@ -1,161 +1,1441 @@
 from abc import ABC, abstractmethod
-from collections import deque
+from array import array
+from collections import deque, OrderedDict
+import functools
 import heapq
+import itertools
+import numpy as np
+import weakref
 from typing import List, Tuple, Set, Optional
 
-class PathFinder(ABC):
+INF = float('inf')
+
+
+class GridMap:
+    """
+    Compact array-backed view of a maze, shared by every PathFinder working on it.
+    Cells are addressed by integer ids (x * width + y), walkability is a flat bytearray
+    and the walkable 4-neighbours of every cell are precomputed once.
+
+    Mazes must be mutated through set_cell so that the model stays in sync. Every
+    mutation gives the grid a new version number, unique across all grids, which
+    invalidates anything cached for the previous layout.
+    """
+    cache_size = 16
+    _cache = OrderedDict()
+    _versions = itertools.count(1)
+
     def __init__(self, maze):
+        """
+        Build the grid model
+        :param maze: 2D list representing the maze
+        """
+        self.maze = maze
+        self.height = len(maze)
+        self.width = len(maze[0]) if maze else 0
+        self.size = self.height * self.width
+        self.walkable = bytearray(cell != '#' for row in maze for cell in row)
+        self.rows = [x for x in range(self.height) for _ in range(self.width)]
+        self.cols = list(range(self.width)) * self.height
+        self.neighbors = [self._walkable_neighbors(cell) for cell in range(self.size)]
+        self.version = next(self._versions)
+        self.derived = {}  # Preprocessing built on this layout, dropped on every mutation
+        self.listeners = weakref.WeakSet()  # Objects with on_cell_changed(grid, cell), told about every mutation
+
+    @classmethod
+    def of(cls, maze):
+        """
+        Get the shared grid model of a maze, building it on first use
+        :param maze: 2D list representing the maze
+        :return: GridMap instance
+        """
+        grid = cls._cache.get(id(maze))
+        if grid is not None and grid.maze is maze:
+            cls._cache.move_to_end(id(maze))
+            return grid
+        grid = cls(maze)
+        cls._cache[id(maze)] = grid
+        if len(cls._cache) > cls.cache_size:
+            cls._cache.popitem(last=False)
+        return grid
+
+    def _walkable_neighbors(self, cell):
+        if not self.walkable[cell]:
+            return ()
+        x, y = divmod(cell, self.width)
+        # Same order as PathFinder.directions: up, down, left, right
+        candidates = []
+        if x > 0:
+            candidates.append(cell - self.width)
+        if x < self.height - 1:
+            candidates.append(cell + self.width)
+        if y > 0:
+            candidates.append(cell - 1)
+        if y < self.width - 1:
+            candidates.append(cell + 1)
+        return tuple(n for n in candidates if self.walkable[n])
+
+    def set_cell(self, x, y, value):
+        """
+        Change one maze cell and refresh the model around it
+        :param x: Row of the cell
+        :param y: Column of the cell
+        :param value: New cell content, '#' for a wall
+        """
+        self.maze[x][y] = value
+        cell = self.cell_id(x, y)
+        self.walkable[cell] = value != '#'
+        for affected in (cell,) + self._adjacent(cell):
+            self.neighbors[affected] = self._walkable_neighbors(affected)
+        self.version = next(self._versions)
+        self.derived.clear()
+        for listener in list(self.listeners):
+            listener.on_cell_changed(self, cell)
+
+    def add_listener(self, listener):
+        """
+        Register an object to be notified of cell changes; it is held weakly
+        :param listener: Object with an on_cell_changed(grid, cell) method
+        """
+        self.listeners.add(listener)
+
+    def _adjacent(self, cell):
+        x, y = divmod(cell, self.width)
+        return tuple(self.cell_id(x + dx, y + dy) for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                     if 0 <= x + dx < self.height and 0 <= y + dy < self.width)
+
+    def get_derived(self, name, build):
+        """
+        Get preprocessing data for the current layout, building it on first use
+        :param name: Key of the data
+        :param build: Function taking the GridMap and returning the data
+        """
+        if name not in self.derived:
+            self.derived[name] = build(self)
+        return self.derived[name]
+
+    def cell_id(self, x, y):
+        return x * self.width + y
+
+    def position(self, cell):
+        return divmod(cell, self.width)
+
+    def trace_path(self, parent, target):
+        """
+        Walk a flat parent array back from the target
+        :param parent: List where parent[cell] is the predecessor cell, the source points to itself and -1 means unreached
+        :param target: Cell id of the goal
+        :return: List of (x, y) positions from source to target, or [] if the target was never reached
+        """
+        if parent[target] < 0:
+            return []
+        path = []
+        cell = target
+        while True:
+            path.append(divmod(cell, self.width))
+            if parent[cell] == cell:
+                break
+            cell = parent[cell]
+        return path[::-1]
+
+
+class DistanceField:
+    """
+    Exact walking distance from every cell of a maze to one target, computed by a
+    single reverse BFS. With unit step costs this answers any excavator-to-target
+    cost query in O(1) and extracts a shortest path by gradient descent.
+    """
+    def __init__(self, grid, target):
+        """
+        Build the field
+        :param grid: GridMap of the maze
+        :param target: (x, y) tuple of the target position
+        """
+        self.grid = grid
+        self.target = target
+        self.version = grid.version
+        self.distances = array('i', [-1]) * grid.size
+        neighbors, distances = grid.neighbors, self.distances
+        source = grid.cell_id(*target)
+        distances[source] = 0
+        frontier = [source]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for cell in frontier:
+                for neighbor in neighbors[cell]:
+                    if distances[neighbor] < 0:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+
+    @property
+    def nbytes(self):
+        return self.distances.itemsize * len(self.distances)
+
+    def distance(self, position):
+        """
+        :param position: (x, y) tuple
+        :return: Number of steps from position to the target, -1 if unreachable
+        """
+        return self.distances[self.grid.cell_id(*position)]
+
+    def path_from(self, start):
+        """
+        Follow the field downhill from start to the target
+        :param start: (x, y) tuple of the start position
+        :return: List of positions from start to target, or [] if the target is unreachable
+        """
+        grid, distances = self.grid, self.distances
+        cell = grid.cell_id(*start)
+        remaining = distances[cell]
+        if remaining < 0:
+            return []
+        path = [start]
+        while remaining > 0:
+            remaining -= 1
+            for neighbor in grid.neighbors[cell]:
+                if distances[neighbor] == remaining:
+                    cell = neighbor
+                    break
+            path.append(grid.position(cell))
+        return path
+
+
+class DistanceFieldCache:
+    """
+    LRU cache of distance fields keyed by maze and target. Fields are built lazily on
+    the first query, rebuilt when the maze version changes, and the least recently
+    used ones are evicted once the memory budget is exceeded.
+    """
+    def __init__(self, memory_budget=64 * 2**20):
+        """
+        :param memory_budget: Maximum number of bytes held by cached fields
+        """
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self.fields = OrderedDict()
+
+    def get(self, maze, target):
+        """
+        Get the distance field of a target, building it if needed
+        :param maze: 2D list representing the maze
+        :param target: (x, y) tuple of the target position
+        :return: DistanceField instance
+        """
+        grid = GridMap.of(maze)
+        key = (grid, target)
+        field = self.fields.get(key)
+        if field is not None and field.version == grid.version:
+            self.fields.move_to_end(key)
+            return field
+        if field is not None:
+            del self.fields[key]
+            self.memory_used -= field.nbytes
+
+        field = DistanceField(grid, target)
+        self.fields[key] = field
+        self.memory_used += field.nbytes
+        while self.memory_used > self.memory_budget and len(self.fields) > 1:
+            _, evicted = self.fields.popitem(last=False)
+            self.memory_used -= evicted.nbytes
+        return field
+
+    def distance(self, maze, start, target):
+        return self.get(maze, target).distance(start)
+
+    def path(self, maze, start, target):
+        return self.get(maze, target).path_from(start)
+
+    def clear(self):
+        self.fields.clear()
+        self.memory_used = 0
+
+
+class WavefrontBFS:
+    """
+    Vectorized multi-source BFS. All sources grow in lockstep: the stacked frontier of
+    every source is expanded with one NumPy gather through a neighbour table built
+    from the wall mask, and newly reached cells are stamped with the step number in a
+    (sources, cells) distance tensor. Only live frontier cells are touched, so the
+    total work stays proportional to sources x cells even on long maze corridors.
+    """
+    def __init__(self, maze, batch_size=64):
+        """
+        :param maze: 2D list representing the maze
+        :param batch_size: Maximum number of sources grown together, bounds memory to
+                           about 8 * batch_size * cells bytes
+        """
+        self.maze = maze
+        self.batch_size = batch_size
+        self._neighbor_table = None
+        self._version = None
+
+    @property
+    def neighbor_table(self):
+        """
+        (cells + 1, 4) array of neighbour cell ids in PathFinder.directions order. Walls,
+        borders and the extra sentinel row all point at the sentinel cell id `cells`.
+        """
+        grid = GridMap.of(self.maze)
+        if self._version != grid.version:
+            height, width, size = grid.height, grid.width, grid.size
+            mask = np.frombuffer(bytes(grid.walkable), dtype=np.uint8).reshape(height, width).astype(bool)
+            cells = np.arange(size).reshape(height, width)
+            table = np.full((size + 1, 4), size, dtype=np.intp)
+            for k, (dx, dy) in enumerate(((-1, 0), (1, 0), (0, -1), (0, 1))):
+                shifted = np.full((height, width), size, dtype=np.intp)
+                target_rows = slice(max(dx, 0), height + min(dx, 0))
+                target_cols = slice(max(dy, 0), width + min(dy, 0))
+                source_rows = slice(max(-dx, 0), height + min(-dx, 0))
+                source_cols = slice(max(-dy, 0), width + min(-dy, 0))
+                shifted[source_rows, source_cols] = np.where(mask[target_rows, target_cols],
+                                                             cells[target_rows, target_cols], size)
+                table[:size, k] = np.where(mask, shifted, size).ravel()
+            self._neighbor_table = table
+            self._version = grid.version
+        return self._neighbor_table
+
+    def distances(self, sources):
+        """
+        Distance fields of many sources
+        :param sources: List of (x, y) tuples
+        :return: Integer array of shape (len(sources), height, width), -1 where unreachable
+        """
+        grid = GridMap.of(self.maze)
+        table = self.neighbor_table
+        result = np.empty((len(sources), grid.height, grid.width), dtype=np.int32)
+        for begin in range(0, len(sources), self.batch_size):
+            batch = sources[begin:begin + self.batch_size]
+            result[begin:begin + len(batch)] = self._grow(grid, table, batch).reshape(-1, grid.height, grid.width)
+        return result
+
+    def _grow(self, grid, table, sources):
+        size = grid.size
+        stride = size + 1
+        distances = np.full((len(sources), stride), -1, dtype=np.int32)
+        distances[:, size] = 0  # The sentinel counts as already reached
+        flat = distances.reshape(-1)
+        claim = np.empty(flat.shape, dtype=np.int32)
+
+        # The frontier is a flat array of keys source * stride + cell
+        xs, ys = np.array(sources, dtype=np.intp).reshape(-1, 2).T
+        keys = np.arange(len(sources), dtype=np.intp) * stride + xs * grid.width + ys
+        flat[keys] = 0
+        step = 0
+        while keys.size:
+            step += 1
+            cells = keys % stride
+            keys = ((keys - cells)[:, None] + table[cells]).ravel()
+            keys = keys[flat[keys] < 0]
+            # Keep one copy of each (source, cell) pair reached twice in this step
+            order = np.arange(keys.size, dtype=np.int32)
+            claim[keys] = order
+            keys = keys[claim[keys] == order]
+            flat[keys] = step
+        return distances[:, :size]
+
+    def distance_matrix(self, starts, targets):
+        """
+        Distances from every start to every target, growing one field per target
+        :param starts: List of (x, y) tuples
+        :param targets: List of (x, y) tuples
+        :return: Integer array of shape (len(starts), len(targets)), -1 where unreachable
+        """
+        if not starts or not targets:
+            return np.zeros((len(starts), len(targets)), dtype=np.int32)
+        xs, ys = np.array(starts, dtype=np.intp).reshape(-1, 2).T
+        return self.distances(targets)[:, xs, ys].T
+
+
+class PathCache:
+    """
+    LRU memo of path queries keyed by (finder, maze_version, start, goal). For finders
+    that return shortest paths, a query whose reverse is cached is answered by reversing
+    that path. Since the maze version changes on every mutation, stale paths are never
+    returned.
+    """
+    def __init__(self, maxsize=4096):
+        """
+        :param maxsize: Maximum number of cached paths
+        """
+        self.maxsize = maxsize
+        self.paths = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, finder, version, start, goal, reversible=False):
+        """
+        :param reversible: Whether a cached goal to start path may answer the query, which
+            only holds for finders that return shortest paths
+        :return: A fresh list with the cached path, or None on a miss
+        """
+        key = (finder, version, start, goal)
+        path = self.paths.get(key)
+        if path is not None:
+            self.paths.move_to_end(key)
+            self.hits += 1
+            return list(path)
+        reverse_key = (finder, version, goal, start)
+        path = self.paths.get(reverse_key) if reversible else None
+        if path is not None:
+            self.paths.move_to_end(reverse_key)
+            self.hits += 1
+            return list(reversed(path))
+        self.misses += 1
+        return None
+
+    def store(self, finder, version, start, goal, path):
+        self.paths[(finder, version, start, goal)] = tuple(path)
+        if len(self.paths) > self.maxsize:
+            self.paths.popitem(last=False)
+
+    def clear(self):
+        self.paths.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        queries = self.hits + self.misses
+        return self.hits / queries if queries else 0.0
+
+
+def _memoized(find_path):
+    @functools.wraps(find_path)
+    def cached_find_path(self, start, goal):
+        if self.path_cache is None:
+            return find_path(self, start, goal)
+        # Finders built with other parameters may return other paths
+        finder = (type(self).__name__,) + tuple(sorted(self.parameters().items()))
+        version = self.grid.version
+        path = self.path_cache.lookup(finder, version, start, goal, reversible=self.optimal)
+        if path is None:
+            path = find_path(self, start, goal)
+            self.path_cache.store(finder, version, start, goal, path)
+        else:
+            self.expanded_nodes = 0
+        return path
+    return cached_find_path
+
+
+class PathFinder(ABC):
+    optimal = False  # Returns shortest paths, so the reverse of a path answers the reverse query
+    incremental = False  # Keeps search state between calls, so it should only answer its owner's own queries
+
+    def __init__(self, maze, path_cache=None):
+        """
+        :param maze: 2D list representing the maze
+        :param path_cache: Optional PathCache memoizing find_path, may be shared between finders
+        """
         self.maze = maze
         self.directions = [(-1,0), (1,0), (0,-1), (0,1)]
-    
+        self.path_cache = path_cache
+        self.expanded_nodes = 0  # Nodes expanded by the last find_path call
+        self._grid = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every concrete find_path goes through the optional path cache
+        if 'find_path' in cls.__dict__:
+            cls.find_path = _memoized(cls.__dict__['find_path'])
+
     @abstractmethod
     def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
         pass
-    
+
+    def parameters(self):
+        """
+        :return: Dictionary of the constructor arguments besides maze and path_cache, so that
+            finder class and parameters together tell which paths the finder returns
+        """
+        return {}
+
+    @property
+    def grid(self):
+        if self._grid is None or self._grid.maze is not self.maze:
+            self._grid = GridMap.of(self.maze)
+        return self._grid
+
     def in_bounds(self, x, y):
         return 0 <= x < len(self.maze) and 0 <= y < len(self.maze[0])
 
     def is_walkable(self, x, y):
         return self.maze[x][y] != '#'
 
+    def reconstruct_path(self, parent, goal):
+        """
+        Walk the parent pointers back from the goal
+        :param parent: Flat parent array indexed by cell id (see GridMap.trace_path)
+        :param goal: (x, y) tuple of the goal position
+        :return: List of positions from start to goal, or [] if the goal was never reached
+        """
+        return self.grid.trace_path(parent, self.grid.cell_id(*goal))
+
 class BFSFinder(PathFinder):
+    optimal = True
+
     def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
-        queue = deque()
-        queue.append((start, [start]))
-        visited = set()
-        
+        grid = self.grid
+        neighbors = grid.neighbors
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        parent = [-1] * grid.size
+        parent[source] = source
+        queue = deque([source])
+        expanded = 0
+
         while queue:
-            (x, y), path = queue.popleft()
-            if (x, y) == goal:
-                return path
-                
-            for dx, dy in self.directions:
-                nx, ny = x + dx, y + dy
-                if self.in_bounds(nx, ny) and self.is_walkable(nx, ny) and (nx, ny) not in visited:
-                    visited.add((nx, ny))
-                    queue.append(((nx, ny), path + [(nx, ny)]))
+            current = queue.popleft()
+            if current == target:
+                self.expanded_nodes = expanded
+                return self.reconstruct_path(parent, goal)
+            expanded += 1
+
+            for neighbor in neighbors[current]:
+                if parent[neighbor] < 0:
+                    parent[neighbor] = current
+                    queue.append(neighbor)
+        self.expanded_nodes = expanded
         return []
 
 class AStarFinder(PathFinder):
+    optimal = True
+
     def heuristic(self, a: Tuple[int, int], b: Tuple[int, int]) -> float:
         return abs(a[0] - b[0]) + abs(a[1] - b[1])
-    
+
     def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
-        heap = [(0 + self.heuristic(start, goal), 0, start)]
-        visited = set()
-        cost_so_far = {start: 0}
-        came_from = {start: None}
+        grid = self.grid
+        neighbors, rows, cols = grid.neighbors, grid.rows, grid.cols
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        gx, gy = goal
+        # Heap entries are (priority, cost, cell) packed into one int, which keeps the
+        # tuple ordering but compares much faster
+        bits = grid.size.bit_length()
+        mask = (1 << bits) - 1
+        heap = [(((0 + self.heuristic(start, goal)) << bits | 0) << bits) | source]
+        visited = bytearray(grid.size)
+        cost_so_far = [-1] * grid.size
+        cost_so_far[source] = 0
+        parent = [-1] * grid.size
+        parent[source] = source
+        expanded = 0
 
         while heap:
-            _, cost, current = heapq.heappop(heap)
-            if current == goal:
+            current = heapq.heappop(heap) & mask
+            if current == target:
                 break
-            if current in visited:
+            if visited[current]:
                 continue
-            visited.add(current)
-
-            for dx, dy in self.directions:
-                nx, ny = current[0] + dx, current[1] + dy
-                if self.in_bounds(nx, ny) and self.is_walkable(nx, ny) and (nx, ny) not in visited:
-                    new_cost = cost_so_far[current] + 1
-                    neighbor = (nx, ny)
-                    if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+            visited[current] = 1
+            expanded += 1
+
+            new_cost = cost_so_far[current] + 1
+            for neighbor in neighbors[current]:
+                if not visited[neighbor]:
+                    if cost_so_far[neighbor] < 0 or new_cost < cost_so_far[neighbor]:
                         cost_so_far[neighbor] = new_cost
-                        priority = new_cost + self.heuristic(neighbor, goal)
-                        came_from[neighbor] = current
-                        heapq.heappush(heap, (priority, new_cost, neighbor))
+                        priority = new_cost + abs(rows[neighbor] - gx) + abs(cols[neighbor] - gy)
+                        parent[neighbor] = current
+                        heapq.heappush(heap, ((priority << bits | new_cost) << bits) | neighbor)
+
+        self.expanded_nodes = expanded
+        return self.reconstruct_path(parent, goal)
 
-        path = []
-        node = goal
-        while node:
-            path.append(node)
-            node = came_from.get(node)
-        return path[::-1] if goal in came_from else []
-        
 
 class DFSFinder(PathFinder):
     def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
-        stack = [(start, [start])]
-        visited = set()
-        
+        grid = self.grid
+        neighbors = grid.neighbors
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        stack = [(source, source)]
+        parent = [-1] * grid.size
+        expanded = 0
+
         while stack:
-            (x, y), path = stack.pop()
-            if (x, y) == goal:
-                return path
-                
-            if (x, y) in visited:
+            current, previous = stack.pop()
+            if parent[current] >= 0:
                 continue
-                
-            visited.add((x, y))
-            
-            for dx, dy in self.directions:
-                nx, ny = x + dx, y + dy
-                if self.in_bounds(nx, ny) and self.is_walkable(nx, ny) and (nx, ny) not in visited:
-                    stack.append(((nx, ny), path + [(nx, ny)]))
+
+            parent[current] = previous
+            if current == target:
+                self.expanded_nodes = expanded
+                return self.reconstruct_path(parent, goal)
+            expanded += 1
+
+            for neighbor in neighbors[current]:
+                if parent[neighbor] < 0:
+                    stack.append((neighbor, current))
+        self.expanded_nodes = expanded
         return []
-    
-    
+
+
 class DijkstraFinder(PathFinder):
+    optimal = True
+
     def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
-        heap = [(0, start)]
-        visited = set()
-        distances = {start: 0}
-        previous = {start: None}
-        
+        grid = self.grid
+        neighbors = grid.neighbors
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        # Heap entries are (distance, cell) packed into one int
+        bits = grid.size.bit_length()
+        mask = (1 << bits) - 1
+        heap = [source]
+        visited = bytearray(grid.size)
+        distances = [-1] * grid.size
+        distances[source] = 0
+        parent = [-1] * grid.size
+        parent[source] = source
+        expanded = 0
+
         while heap:
-            current_distance, current = heapq.heappop(heap)
-            
-            if current == goal:
+            current = heapq.heappop(heap) & mask
+
+            if current == target:
                 break
-                
-            if current in visited:
+
+            if visited[current]:
                 continue
-                
-            visited.add(current)
-            
-            for dx, dy in self.directions:
-                nx, ny = current[0] + dx, current[1] + dy
-                neighbor = (nx, ny)
-                if self.in_bounds(nx, ny) and self.is_walkable(nx, ny) and neighbor not in visited:
-                    new_distance = current_distance + 1
-                    if neighbor not in distances or new_distance < distances[neighbor]:
+
+            visited[current] = 1
+            expanded += 1
+
+            new_distance = distances[current] + 1
+            for neighbor in neighbors[current]:
+                if not visited[neighbor]:
+                    if distances[neighbor] < 0 or new_distance < distances[neighbor]:
                         distances[neighbor] = new_distance
-                        previous[neighbor] = current
-                        heapq.heappush(heap, (new_distance, neighbor))
-        
-        path = []
-        node = goal
-        while node:
-            path.append(node)
-            node = previous.get(node)
-        return path[::-1] if goal in previous else []
+                        parent[neighbor] = current
+                        heapq.heappush(heap, new_distance << bits | neighbor)
+
+        self.expanded_nodes = expanded
+        return self.reconstruct_path(parent, goal)
 
 class GBFSFinder(PathFinder):
-    def heuristic(self, a, b):  
+    def heuristic(self, a, b):
         return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
     def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
-        heap = [(self.heuristic(start, goal), start)]
-        came_from = {start: None}
-        visited = set()
+        grid = self.grid
+        neighbors, rows, cols = grid.neighbors, grid.rows, grid.cols
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        gx, gy = goal
+        bits = grid.size.bit_length()
+        mask = (1 << bits) - 1
+        heap = [self.heuristic(start, goal) << bits | source]
+        parent = [-1] * grid.size
+        parent[source] = source
+        visited = bytearray(grid.size)
+        expanded = 0
 
         while heap:
-            _, current = heapq.heappop(heap)
-            if current == goal:
+            current = heapq.heappop(heap) & mask
+            if current == target:
                 break
-            visited.add(current)
-
-            for dx, dy in self.directions:
-                nx, ny = current[0] + dx, current[1] + dy
-                neighbor = (nx, ny)
-                if self.in_bounds(nx, ny) and self.is_walkable(nx, ny) and neighbor not in visited:
-                    if neighbor not in came_from:
-                        came_from[neighbor] = current
-                        heapq.heappush(heap, (self.heuristic(neighbor, goal), neighbor))
-        path = []
-        node = goal
-        while node:
-            path.append(node)
-            node = came_from.get(node)
-        return path[::-1] if goal in came_from else []
-            
\ No newline at end of file
+            visited[current] = 1
+            expanded += 1
+
+            for neighbor in neighbors[current]:
+                if not visited[neighbor] and parent[neighbor] < 0:
+                    parent[neighbor] = current
+                    heapq.heappush(heap, (abs(rows[neighbor] - gx) + abs(cols[neighbor] - gy)) << bits | neighbor)
+        self.expanded_nodes = expanded
+        return self.reconstruct_path(parent, goal)
+
+
+class BidirectionalBFSFinder(PathFinder):
+    """
+    Breadth-first search grown one full layer at a time from both ends, always on the
+    smaller frontier. The first cell reached from both sides closes a shortest path,
+    because every shorter path would have met in an earlier layer.
+    """
+    optimal = True
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        grid = self.grid
+        neighbors = grid.neighbors
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        self.expanded_nodes = 0
+        if source == target:
+            return [start]
+        forward_parent = [-1] * grid.size
+        forward_parent[source] = source
+        backward_parent = [-1] * grid.size
+        backward_parent[target] = target
+        forward_frontier, backward_frontier = [source], [target]
+        expanded = 0
+        meeting = -1
+
+        while forward_frontier and backward_frontier and meeting < 0:
+            if len(forward_frontier) <= len(backward_frontier):
+                frontier, parent, other_parent = forward_frontier, forward_parent, backward_parent
+            else:
+                frontier, parent, other_parent = backward_frontier, backward_parent, forward_parent
+            next_frontier = []
+            for current in frontier:
+                expanded += 1
+                for neighbor in neighbors[current]:
+                    if parent[neighbor] < 0:
+                        parent[neighbor] = current
+                        if other_parent[neighbor] >= 0:
+                            meeting = neighbor
+                            break
+                        next_frontier.append(neighbor)
+                if meeting >= 0:
+                    break
+            if parent is forward_parent:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+
+        self.expanded_nodes = expanded
+        if meeting < 0:
+            return []
+        return _join_at(grid, forward_parent, backward_parent, meeting)
+
+
+class BidirectionalAStarFinder(AStarFinder):
+    """
+    A* run from the start and from the goal at the same time with the average
+    potential p(v) = (h(v, goal) - h(v, start)) / 2, forward keys g + p and backward
+    keys g - p. Both potentials are consistent, so each side only closes cells at their
+    final cost and the best meeting cost mu is optimal once the two lowest keys sum to
+    at least mu. Keys are doubled to stay integral.
+    """
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        grid = self.grid
+        neighbors, rows, cols = grid.neighbors, grid.rows, grid.cols
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        self.expanded_nodes = 0
+        if source == target:
+            return [start]
+        bits = grid.size.bit_length()
+        mask = (1 << bits) - 1
+        sx, sy = start
+        gx, gy = goal
+        forward = _SearchSide(grid, source, self.heuristic(start, goal), bits, 1)
+        backward = _SearchSide(grid, target, self.heuristic(start, goal), bits, -1)
+        best_cost = float('inf')
+        meeting = -1
+        expanded = 0
+
+        while forward.heap and backward.heap:
+            forward_key, backward_key = forward.heap[0] >> bits, backward.heap[0] >> bits
+            if forward_key + backward_key >= 2 * best_cost:
+                break
+            side, other = (forward, backward) if len(forward.heap) <= len(backward.heap) else (backward, forward)
+            current = heapq.heappop(side.heap) & mask
+            if side.closed[current]:
+                continue
+            side.closed[current] = 1
+            expanded += 1
+
+            cost, other_cost, parent, sign = side.cost, other.cost, side.parent, side.sign
+            new_cost = cost[current] + 1
+            for neighbor in neighbors[current]:
+                if side.closed[neighbor]:
+                    continue
+                if cost[neighbor] < 0 or new_cost < cost[neighbor]:
+                    cost[neighbor] = new_cost
+                    parent[neighbor] = current
+                    nx, ny = rows[neighbor], cols[neighbor]
+                    potential = abs(nx - gx) + abs(ny - gy) - abs(nx - sx) - abs(ny - sy)
+                    heapq.heappush(side.heap, (2 * new_cost + sign * potential) << bits | neighbor)
+                    if other_cost[neighbor] >= 0 and new_cost + other_cost[neighbor] < best_cost:
+                        best_cost = new_cost + other_cost[neighbor]
+                        meeting = neighbor
+
+        self.expanded_nodes = expanded
+        if meeting < 0:
+            return []
+        return _join_at(grid, forward.parent, backward.parent, meeting)
+
+
+class JPSFinder(AStarFinder):
+    """
+    Jump Point Search for the 4-connected grid. Straight runs are skipped by jumping:
+    horizontal jumps stop at cells with a forced vertical neighbour, vertical jumps also
+    stop wherever a horizontal probe would find a jump point. A* only pushes the jump
+    points, and the result is expanded back into a cell-by-cell path.
+
+    Everything about a jump except the goal is static, so the run lengths and the
+    distance to the next jump point in every direction are precomputed once per maze
+    layout (see JumpTable) and each jump costs O(1).
+    """
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        grid = self.grid
+        width = grid.width
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        self.expanded_nodes = 0
+        if source == target:
+            return [start]
+        if not grid.walkable[target]:
+            return []
+        table = grid.get_derived('jump_table', JumpTable)
+        gx, gy = goal
+        bits = grid.size.bit_length()
+        mask = (1 << bits) - 1
+        heap = [((self.heuristic(start, goal) << bits) << bits) | source]
+        closed = bytearray(grid.size)
+        cost_so_far = [-1] * grid.size
+        cost_so_far[source] = 0
+        parent = [-1] * grid.size
+        parent[source] = source
+        expanded = 0
+
+        while heap:
+            current = heapq.heappop(heap) & mask
+            if current == target:
+                break
+            if closed[current]:
+                continue
+            closed[current] = 1
+            expanded += 1
+
+            x, y = divmod(current, width)
+            for direction in self._pruned_directions(current, parent[current]):
+                steps = table.jump(direction, x, y, gx, gy)
+                if not steps:
+                    continue
+                dx, dy = JumpTable.directions[direction]
+                jx, jy = x + dx * steps, y + dy * steps
+                neighbor = jx * width + jy
+                if closed[neighbor]:
+                    continue
+                new_cost = cost_so_far[current] + steps
+                if cost_so_far[neighbor] < 0 or new_cost < cost_so_far[neighbor]:
+                    cost_so_far[neighbor] = new_cost
+                    parent[neighbor] = current
+                    priority = new_cost + abs(jx - gx) + abs(jy - gy)
+                    heapq.heappush(heap, ((priority << bits | new_cost) << bits) | neighbor)
+
+        self.expanded_nodes = expanded
+        return self._expand(self.reconstruct_path(parent, goal))
+
+    def _pruned_directions(self, current, previous):
+        """
+        Directions worth exploring from a jump point, given where it was reached from
+        :return: Indices into JumpTable.directions
+        """
+        if previous == current:
+            return JumpTable.UP, JumpTable.DOWN, JumpTable.LEFT, JumpTable.RIGHT
+        if current // self.grid.width == previous // self.grid.width:
+            return JumpTable.UP, JumpTable.DOWN, (JumpTable.RIGHT if current > previous else JumpTable.LEFT)
+        return JumpTable.LEFT, JumpTable.RIGHT, (JumpTable.DOWN if current > previous else JumpTable.UP)
+
+    def _expand(self, jump_points):
+        """
+        Fill in the straight runs between consecutive jump points
+        """
+        if not jump_points:
+            return []
+        path = [jump_points[0]]
+        for (ax, ay), (bx, by) in zip(jump_points, jump_points[1:]):
+            dx, dy = (bx > ax) - (bx < ax), (by > ay) - (by < ay)
+            while (ax, ay) != (bx, by):
+                ax, ay = ax + dx, ay + dy
+                path.append((ax, ay))
+        return path
+
+
+class JumpTable:
+    """
+    Per-layout jump data for JPSFinder. For every cell and direction, run_length[d][cell] is how
+    many open cells follow before a wall, and next_jump[d][cell] is the distance to the first
+    of them that is a jump point (0 if there is none).
+
+    A cell is a horizontal jump point if moving sideways into it reveals an opening that
+    was walled off one step earlier. A cell is a vertical jump point on the same
+    condition, or if a horizontal probe from it finds a horizontal jump point.
+    """
+    UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+    directions = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.run_length = [[0] * grid.size for _ in range(4)]
+        self.next_jump = [[0] * grid.size for _ in range(4)]
+        self._scan(self.LEFT)
+        self._scan(self.RIGHT)
+        self._scan(self.UP)
+        self._scan(self.DOWN)
+
+    def _open(self, x, y):
+        grid = self.grid
+        return 0 <= x < grid.height and 0 <= y < grid.width and grid.walkable[x * grid.width + y]
+
+    def _is_jump_point(self, direction, x, y):
+        is_open = self._open
+        dx, dy = self.directions[direction]
+        if dy:
+            return ((is_open(x - 1, y) and not is_open(x - 1, y - dy)) or
+                    (is_open(x + 1, y) and not is_open(x + 1, y - dy)))
+        cell = x * self.grid.width + y
+        return ((is_open(x, y - 1) and not is_open(x - dx, y - 1)) or
+                (is_open(x, y + 1) and not is_open(x - dx, y + 1)) or
+                self.next_jump[self.LEFT][cell] > 0 or self.next_jump[self.RIGHT][cell] > 0)
+
+    def _scan(self, direction):
+        """
+        Fill run_length and next_jump for one direction, sweeping against it so each cell reuses the next
+        """
+        grid = self.grid
+        dx, dy = self.directions[direction]
+        run, jump = self.run_length[direction], self.next_jump[direction]
+        rows = range(grid.height - 1, -1, -1) if dx > 0 else range(grid.height)
+        cols = range(grid.width - 1, -1, -1) if dy > 0 else range(grid.width)
+        for x in rows:
+            for y in cols:
+                nx, ny = x + dx, y + dy
+                if not self._open(x, y) or not self._open(nx, ny):
+                    continue
+                cell, next_cell = x * grid.width + y, nx * grid.width + ny
+                run[cell] = run[next_cell] + 1
+                if self._is_jump_point(direction, nx, ny):
+                    jump[cell] = 1
+                elif jump[next_cell]:
+                    jump[cell] = jump[next_cell] + 1
+
+    def jump(self, direction, x, y, gx, gy):
+        """
+        Distance from (x, y) to the next jump point or goal in one direction
+        :return: Number of steps, 0 if the run ends in a wall first
+        """
+        cell = x * self.grid.width + y
+        run = self.run_length[direction][cell]
+        if not run:
+            return 0
+        best = self.next_jump[direction][cell] or run + 1
+        dx, dy = self.directions[direction]
+        if dy:
+            if gx == x and 0 < (gy - y) * dy <= run:
+                best = min(best, (gy - y) * dy)
+        elif 0 < (gx - x) * dx <= run:
+            steps = (gx - x) * dx
+            # On the goal's row a horizontal probe reaches the goal if no wall is in between
+            if gy == y:
+                best = min(best, steps)
+            else:
+                side = self.RIGHT if gy > y else self.LEFT
+                if self.run_length[side][(x + dx * steps) * self.grid.width + y] >= abs(gy - y):
+                    best = min(best, steps)
+        return best if best <= run else 0
+
+
+class JunctionGraph:
+    """
+    The maze contracted to its junctions and dead ends (cells whose degree is not 2).
+    Every corridor of degree-2 cells becomes one weighted edge. An edge only stores
+    its first cell, since a corridor can be walked deterministically to its far end.
+    """
+    def __init__(self, grid):
+        self.grid = grid
+        neighbors = grid.neighbors
+        self.is_node = bytearray(grid.walkable[cell] and len(neighbors[cell]) != 2 for cell in range(grid.size))
+        self.edges = {}
+        for cell in range(grid.size):
+            if self.is_node[cell]:
+                edges = []
+                for first in neighbors[cell]:
+                    end, length, _ = self.walk(cell, first)
+                    edges.append((end, length, first))
+                self.edges[cell] = edges
+
+    def walk(self, previous, current, stop=-1):
+        """
+        Follow a corridor until a node, the stop cell, or back to where it started
+        :param previous: Cell the walk comes from
+        :param current: First cell of the corridor
+        :param stop: Optional cell to stop at
+        :return: (end cell, number of steps, cell before the end) tuple
+        """
+        neighbors, is_node = self.grid.neighbors, self.is_node
+        origin, length = previous, 1
+        while not is_node[current] and current != stop and current != origin:
+            a, b = neighbors[current]
+            previous, current = current, (b if a == previous else a)
+            length += 1
+        return current, length, previous
+
+    def corridor_cells(self, previous, current, end):
+        """
+        :return: List of cell ids from current up to and including end
+        """
+        neighbors = self.grid.neighbors
+        cells = [current]
+        while current != end:
+            a, b = neighbors[current]
+            previous, current = current, (b if a == previous else a)
+            cells.append(current)
+        return cells
+
+    def attachments(self, cell, stop=-1):
+        """
+        Nodes reachable from a cell without crossing another node
+        :return: List of (node, distance, first cell, cell before node) tuples; a corridor that
+                 reaches the stop cell is returned with the stop cell as its node
+        """
+        if self.is_node[cell]:
+            return [(cell, 0, None, None)]
+        result = []
+        for first in self.grid.neighbors[cell]:
+            end, length, before = self.walk(cell, first, stop)
+            if end != cell and (self.is_node[end] or end == stop):
+                result.append((end, length, first, before))
+        return result
+
+    @property
+    def node_count(self):
+        return len(self.edges)
+
+    @property
+    def edge_count(self):
+        return sum(len(edges) for edges in self.edges.values()) // 2
+
+
+class JunctionGraphFinder(AStarFinder):
+    """
+    A* on the JunctionGraph of the maze. The start and goal are attached to the nodes
+    at both ends of their corridors, and the resulting node sequence is expanded back
+    into cells. The graph is built once per maze layout and shared by all finders.
+    """
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        self.expanded_nodes = 0
+        if source == target:
+            return [start]
+        if not grid.walkable[target] or not grid.walkable[source]:
+            return []
+        graph = grid.get_derived('junction_graph', JunctionGraph)
+        gx, gy = goal
+
+        best_cost, best_end = float('inf'), None
+        cost_so_far, parent, heap = {}, {}, []
+        for node, distance, first, _ in graph.attachments(source, stop=target):
+            if node == target:
+                if distance < best_cost:
+                    best_cost, best_end = distance, ('direct', first)
+                continue
+            if node not in cost_so_far or distance < cost_so_far[node]:
+                cost_so_far[node] = distance
+                parent[node] = (-1, first)
+                heapq.heappush(heap, (distance + abs(rows[node] - gx) + abs(cols[node] - gy), distance, node))
+        goal_nodes = {}
+        for node, distance, _, before in graph.attachments(target):
+            if node not in goal_nodes or distance < goal_nodes[node][0]:
+                goal_nodes[node] = (distance, before)
+
+        closed = set()
+        expanded = 0
+        while heap:
+            priority, cost, current = heapq.heappop(heap)
+            if priority >= best_cost:
+                break
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+            if current in goal_nodes and cost + goal_nodes[current][0] < best_cost:
+                best_cost, best_end = cost + goal_nodes[current][0], ('node', current)
+
+            for neighbor, length, first in graph.edges[current]:
+                new_cost = cost + length
+                if neighbor in closed:
+                    continue
+                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+                    cost_so_far[neighbor] = new_cost
+                    parent[neighbor] = (current, first)
+                    heapq.heappush(heap, (new_cost + abs(rows[neighbor] - gx) + abs(cols[neighbor] - gy),
+                                          new_cost, neighbor))
+
+        self.expanded_nodes = expanded
+        if best_end is None:
+            return []
+        kind, value = best_end
+        if kind == 'direct':
+            cells = [source] + graph.corridor_cells(source, value, target)
+        else:
+            cells = self._node_cells(graph, source, parent, value)
+            if value != target:
+                cells += graph.corridor_cells(value, goal_nodes[value][1], target)
+        return [grid.position(cell) for cell in cells]
+
+    def _node_cells(self, graph, source, parent, node):
+        """
+        Cells from the source to a node, expanding every corridor on the way
+        """
+        segments = []
+        while node != source:
+            previous, first = parent[node]
+            origin = source if previous < 0 else previous
+            segments.append(graph.corridor_cells(origin, first, node))
+            if previous < 0:
+                break
+            node = previous
+        cells = [source]
+        for segment in reversed(segments):
+            cells += segment
+        return cells
+
+
+class ClusterGraph:
+    """
+    Abstract graph for hierarchical pathfinding. The grid is split into square clusters;
+    every maximal run of open cell pairs across a cluster border is an entrance, with a
+    transition in its middle (or at both ends for runs of 6 or more). The two cells of a
+    transition are abstract nodes joined by an edge of cost 1. Distances between the
+    nodes of one cluster are computed the first time the cluster is searched and kept.
+    """
+    long_entrance = 6
+
+    def __init__(self, grid, cluster_size):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.transitions = {}  # node -> list of nodes in neighbouring clusters
+        self.cluster_nodes = {}  # cluster -> list of its nodes
+        self.intra_edges = {}  # cluster -> {node: [(node, distance), ...]}, filled lazily
+        self._find_entrances()
+
+    def cluster_of(self, cell):
+        size = self.cluster_size
+        return self.grid.rows[cell] // size, self.grid.cols[cell] // size
+
+    def _find_entrances(self):
+        grid, size = self.grid, self.cluster_size
+        width = grid.width
+        # Borders between vertically adjacent clusters, then horizontally adjacent ones
+        for x in range(size - 1, grid.height - 1, size):
+            self._add_entrances([(x * width + y, (x + 1) * width + y) for y in range(width)], size)
+        for y in range(size - 1, width - 1, size):
+            self._add_entrances([(x * width + y, x * width + y + 1) for x in range(grid.height)], size)
+
+    def _add_entrances(self, pairs, size):
+        walkable = self.grid.walkable
+        run = []
+        for index, (a, b) in enumerate(pairs):
+            is_open = walkable[a] and walkable[b]
+            # Runs also end where the border crosses into the next pair of clusters
+            if run and (not is_open or index % size == 0):
+                self._add_transitions(run)
+                run = []
+            if is_open:
+                run.append((a, b))
+        if run:
+            self._add_transitions(run)
+
+    def _add_transitions(self, run):
+        if len(run) >= self.long_entrance:
+            chosen = (run[0], run[-1])
+        else:
+            chosen = (run[len(run) // 2],)
+        for a, b in chosen:
+            for node, partner in ((a, b), (b, a)):
+                if node not in self.transitions:
+                    self.transitions[node] = []
+                    self.cluster_nodes.setdefault(self.cluster_of(node), []).append(node)
+                self.transitions[node].append(partner)
+
+    def local_distances(self, source, cluster):
+        """
+        BFS from source without leaving its cluster
+        :return: Dictionary mapping reached cells to their distance
+        """
+        neighbors, rows, cols, size = self.grid.neighbors, self.grid.rows, self.grid.cols, self.cluster_size
+        cx, cy = cluster
+        distances = {source: 0}
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for cell in frontier:
+                distance = distances[cell] + 1
+                for neighbor in neighbors[cell]:
+                    if neighbor not in distances and rows[neighbor] // size == cx and cols[neighbor] // size == cy:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return distances
+
+    def local_path(self, source, target, cluster):
+        """
+        Shortest path between two cells of one cluster that stays inside it
+        :return: List of cell ids from source to target
+        """
+        distances = self.local_distances(target, cluster)
+        neighbors = self.grid.neighbors
+        cell, remaining = source, distances[source]
+        cells = [source]
+        while remaining:
+            remaining -= 1
+            cell = next(n for n in neighbors[cell] if distances.get(n) == remaining)
+            cells.append(cell)
+        return cells
+
+    def edges(self, cluster):
+        """
+        Intra-cluster edges between the nodes of one cluster, computed on first use
+        """
+        edges = self.intra_edges.get(cluster)
+        if edges is None:
+            nodes = self.cluster_nodes.get(cluster, [])
+            edges = {}
+            for node in nodes:
+                distances = self.local_distances(node, cluster)
+                edges[node] = [(other, distances[other]) for other in nodes if other != node and other in distances]
+            self.intra_edges[cluster] = edges
+        return edges
+
+
+class HPAStarFinder(AStarFinder):
+    """
+    Hierarchical A* (HPA*). The start and goal are connected to the abstract nodes of
+    their clusters, A* runs on the ClusterGraph, and only the abstract edges on the
+    resulting path are refined into cells. Paths are near-optimal rather than optimal.
+    The cluster graph is shared by all finders on the same maze layout.
+    """
+    optimal = False
+
+    def __init__(self, maze, path_cache=None, cluster_size=16):
+        """
+        :param cluster_size: Width and height of a cluster in cells
+        """
+        super().__init__(maze, path_cache)
+        self.cluster_size = cluster_size
+
+    def parameters(self):
+        return {'cluster_size': self.cluster_size}
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        self.expanded_nodes = 0
+        if source == target:
+            return [start]
+        if not grid.walkable[source] or not grid.walkable[target]:
+            return []
+        graph = grid.get_derived(('cluster_graph', self.cluster_size),
+                                 lambda g: ClusterGraph(g, self.cluster_size))
+        gx, gy = goal
+        source_cluster, target_cluster = graph.cluster_of(source), graph.cluster_of(target)
+        source_distances = graph.local_distances(source, source_cluster)
+        target_distances = graph.local_distances(target, target_cluster)
+
+        # Temporary edges of the start and goal
+        source_edges = [(node, source_distances[node]) for node in graph.cluster_nodes.get(source_cluster, [])
+                        if node in source_distances]
+        if target in source_distances:
+            source_edges.append((target, source_distances[target]))
+
+        heap = [(abs(rows[source] - gx) + abs(cols[source] - gy), 0, source)]
+        cost_so_far = {source: 0}
+        parent = {source: None}
+        closed = set()
+        expanded = 0
+        while heap:
+            _, cost, current = heapq.heappop(heap)
+            if current == target:
+                break
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+
+            if current == source:
+                edges = source_edges + [(partner, 1) for partner in graph.transitions.get(source, [])]
+            else:
+                cluster = graph.cluster_of(current)
+                edges = graph.edges(cluster).get(current, []) + [(partner, 1) for partner in graph.transitions[current]]
+                if cluster == target_cluster and current in target_distances:
+                    edges.append((target, target_distances[current]))
+            for neighbor, length in edges:
+                new_cost = cost + length
+                if neighbor not in closed and (neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]):
+                    cost_so_far[neighbor] = new_cost
+                    parent[neighbor] = current
+                    heapq.heappush(heap, (new_cost + abs(rows[neighbor] - gx) + abs(cols[neighbor] - gy),
+                                          new_cost, neighbor))
+
+        self.expanded_nodes = expanded
+        if target not in parent:
+            return []
+        abstract_path = []
+        node = target
+        while node is not None:
+            abstract_path.append(node)
+            node = parent[node]
+        abstract_path.reverse()
+        return [grid.position(cell) for cell in self._refine(graph, abstract_path)]
+
+    def _refine(self, graph, abstract_path):
+        cells = [abstract_path[0]]
+        for a, b in zip(abstract_path, abstract_path[1:]):
+            cluster = graph.cluster_of(a)
+            if cluster != graph.cluster_of(b):
+                cells.append(b)  # Transition edge between adjacent cells
+            else:
+                cells += graph.local_path(a, b, cluster)[1:]
+        return cells
+
+
+class DStarLiteFinder(PathFinder):
+    """
+    Incremental finder (D* Lite). The search runs backwards from the goal and its state
+    is kept between calls, so every excavator should own its finder. Cells changed
+    through GridMap.set_cell are reported to the finder and only the region whose
+    distances they affect is repaired on the next query; moving the start keeps the
+    state too. A new goal or a new grid starts the search from scratch.
+    """
+    optimal = True
+    incremental = True
+
+    def __init__(self, maze, path_cache=None):
+        super().__init__(maze, path_cache)
+        self._state_grid = None
+        self._goal = None
+
+    def on_cell_changed(self, grid, cell):
+        if grid is self._state_grid:
+            self._changed.add(cell)
+
+    def _reset(self, grid, source, target):
+        grid.add_listener(self)
+        self._state_grid = grid
+        self._goal = target
+        self._last = source
+        self._changed = set()
+        self.km = 0
+        self.g = [INF] * grid.size
+        self.rhs = [INF] * grid.size
+        self.rhs[target] = 0
+        self.queue = []
+        self.queue_keys = {}  # Current key of every queued cell, older heap entries are stale
+        self._push(target, (self._heuristic(source, target), 0))
+
+    def _heuristic(self, a, b):
+        rows, cols = self._state_grid.rows, self._state_grid.cols
+        return abs(rows[a] - rows[b]) + abs(cols[a] - cols[b])
+
+    def _push(self, cell, key):
+        self.queue_keys[cell] = key
+        heapq.heappush(self.queue, (key, cell))
+
+    def _compute_shortest_path(self, source, changed=()):
+        """
+        Settle cells until the start is consistent
+        :param changed: Cells whose rhs must be recomputed before the search resumes
+        :return: Number of cells expanded
+        """
+        grid = self._state_grid
+        neighbors, rows, cols = grid.neighbors, grid.rows, grid.cols
+        g, rhs, queue, queue_keys, goal, km = self.g, self.rhs, self.queue, self.queue_keys, self._goal, self.km
+        sx, sy = rows[source], cols[source]
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        def update(cell):
+            if cell != goal:
+                # Wall cells have no neighbours and so become unreachable
+                best = INF
+                for neighbor in neighbors[cell]:
+                    if g[neighbor] < best:
+                        best = g[neighbor]
+                rhs[cell] = best + 1
+            value = g[cell]
+            if value != rhs[cell]:
+                if rhs[cell] < value:
+                    value = rhs[cell]
+                key = (value + abs(rows[cell] - sx) + abs(cols[cell] - sy) + km, value)
+                queue_keys[cell] = key
+                heappush(queue, (key, cell))
+            else:
+                queue_keys.pop(cell, None)
+
+        for cell in changed:
+            update(cell)
+        expanded = 0
+        while queue:
+            old_key, cell = queue[0]
+            if queue_keys.get(cell) != old_key:
+                heappop(queue)
+                continue
+            start_value = g[source] if g[source] < rhs[source] else rhs[source]
+            if old_key >= (start_value + km, start_value) and rhs[source] == g[source]:
+                break
+            heappop(queue)
+            value = g[cell] if g[cell] < rhs[cell] else rhs[cell]
+            new_key = (value + abs(rows[cell] - sx) + abs(cols[cell] - sy) + km, value)
+            if old_key < new_key:
+                queue_keys[cell] = new_key
+                heappush(queue, (new_key, cell))
+                continue
+            del queue_keys[cell]
+            expanded += 1
+            if g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+            else:
+                g[cell] = INF
+                update(cell)
+            for neighbor in neighbors[cell]:
+                update(neighbor)
+        return expanded
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        grid = self.grid
+        source, target = grid.cell_id(*start), grid.cell_id(*goal)
+        changed = ()
+        if grid is not self._state_grid or target != self._goal:
+            self._reset(grid, source, target)
+        else:
+            self.km += self._heuristic(self._last, source)
+            self._last = source
+            if self._changed:
+                # A changed cell alters its own rhs and that of every cell next to it
+                changed = set(self._changed)
+                for cell in self._changed:
+                    changed.update(grid._adjacent(cell))
+                self._changed = set()
+        self.expanded_nodes = self._compute_shortest_path(source, changed)
+
+        g, neighbors = self.g, grid.neighbors
+        if g[source] == INF:
+            return []
+        path = [source]
+        cell = source
+        while cell != target:
+            cell = min(neighbors[cell], key=g.__getitem__)
+            path.append(cell)
+        return [grid.position(cell) for cell in path]
+
+
+class _SearchSide:
+    """
+    Open list and labels of one direction of a bidirectional A*
+    """
+    def __init__(self, grid, source, distance, bits, sign):
+        """
+        :param distance: Heuristic distance between the two search sources
+        :param sign: 1 for the forward side, -1 for the backward side
+        """
+        self.sign = sign
+        # The doubled potential of either source is the source-to-source distance
+        self.heap = [(distance << bits) | source]
+        self.closed = bytearray(grid.size)
+        self.cost = [-1] * grid.size
+        self.cost[source] = 0
+        self.parent = [-1] * grid.size
+        self.parent[source] = source
+
+
+def _join_at(grid, forward_parent, backward_parent, meeting):
+    """
+    Join the two halves of a bidirectional search at the meeting cell
+    :return: List of positions from the forward source to the backward source
+    """
+    path = grid.trace_path(forward_parent, meeting)
+    cell = meeting
+    while backward_parent[cell] != cell:
+        cell = backward_parent[cell]
+        path.append(grid.position(cell))
+    return path
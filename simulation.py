@@ -0,0 +1,321 @@
+import heapq
+import numpy as np
+
+
+class SimulationEngine:
+    """
+    Positions, paths and progress of many robots held in NumPy arrays, so that one tick
+    advances every robot with a few array operations instead of a move() call per robot.
+    All paths live in one shared buffer of cells; every robot has a cursor to the first
+    cell of its remaining path and the end of its path in that buffer, so a move is a
+    cursor increment rather than a list pop.
+
+    Robots are views over one slot of the engine (see Excavator). A tick follows
+    Excavator.move: a robot with a path steps to its second remaining cell (or stays on
+    the last one) and drops the first; a robot whose path is used up calls its
+    on_path_end() hook, which either gives it a new path or clears has_target.
+    """
+    def __init__(self, capacity=16):
+        """
+        :param capacity: Number of robot slots to allocate up front; grows as needed
+        """
+        self.size = 0
+        self.robots = []  # Robot view of every slot
+        self.positions = np.zeros((capacity, 2), dtype=np.int64)
+        self.has_target = np.zeros(capacity, dtype=bool)
+        self.cursor = np.zeros(capacity, dtype=np.int64)  # Buffer index of the first remaining path cell
+        self.end = np.zeros(capacity, dtype=np.int64)  # Buffer index after the last path cell
+        self.buffer = np.zeros((64, 2), dtype=np.int64)
+        self.buffer_used = 0
+        self.ticks = 0
+        self.scheduler = None  # EventScheduler running this engine, see there
+        self.batch_listeners = []  # Objects with on_positions_changed(engine, slots), told about all moves of a tick at once
+
+    def add(self, robot, position):
+        """
+        :param robot: Object with position_listeners and an on_path_end() method
+        :param position: (x, y) tuple of the starting position
+        :return: Slot of the robot
+        """
+        if self.size == len(self.has_target):
+            self._grow_slots(max(2 * self.size, 16))
+        slot = self.size
+        self.size += 1
+        self.robots.append(robot)
+        self.positions[slot] = position
+        return slot
+
+    def add_batch_listener(self, listener):
+        """
+        :param listener: Object with an on_positions_changed(engine, slots) method, called
+            with an array of the slots that moved; added once however often it is passed
+        """
+        if listener not in self.batch_listeners:
+            self.batch_listeners.append(listener)
+
+    def positions_changed(self, slots):
+        for listener in self.batch_listeners:
+            listener.on_positions_changed(self, slots)
+
+    def position(self, slot):
+        if self.scheduler is not None:
+            self.scheduler.sync(slot)
+        return tuple(self.positions[slot].tolist())
+
+    def path(self, slot):
+        """
+        :return: Remaining path of a robot as a list of (x, y) tuples
+        """
+        if self.scheduler is not None:
+            self.scheduler.sync(slot)
+        return [tuple(cell) for cell in self.buffer[self.cursor[slot]:self.end[slot]].tolist()]
+
+    def path_length(self, slot):
+        if self.scheduler is not None:
+            self.scheduler.sync(slot)
+        return int(self.end[slot] - self.cursor[slot])
+
+    def set_path(self, slot, path):
+        """
+        :param path: List of (x, y) tuples, replacing the robot's remaining path
+        """
+        if self.scheduler is not None:
+            self.scheduler.sync(slot)
+        length = len(path)
+        if self.buffer_used + length > len(self.buffer):
+            self._compact(length)
+        start = self.buffer_used
+        if length:
+            self.buffer[start:start + length] = path
+        self.buffer_used += length
+        self.cursor[slot] = start
+        self.end[slot] = start + length
+        if self.scheduler is not None:
+            self.scheduler.path_changed(slot)
+
+    def move(self, slot):
+        """
+        Advance a single robot by one tick, as Excavator.move
+        """
+        cursor, end = self.cursor[slot], self.end[slot]
+        if cursor < end:
+            self.cursor[slot] = cursor + 1
+            self.robots[slot].position = tuple(self.buffer[min(cursor + 1, end - 1)].tolist())
+        else:
+            self.robots[slot].on_path_end()
+
+    def step(self):
+        """
+        Advance every robot by one tick
+        :return: List of robots that ran out of targets during this tick
+        """
+        n = self.size
+        cursor, end = self.cursor[:n], self.end[:n]
+        moving = cursor < end
+        moved = np.flatnonzero(moving)
+        self.positions[moved] = self.buffer[np.minimum(cursor[moved] + 1, end[moved] - 1)]
+        cursor[moved] += 1
+
+        robots = self.robots
+        for slot in moved.tolist():
+            robot = robots[slot]
+            if robot.position_listeners:
+                position = self.position(slot)
+                for listener in robot.position_listeners:
+                    listener.on_position_changed(robot, position)
+        if len(moved):
+            self.positions_changed(moved)
+
+        finished = []
+        for slot in np.flatnonzero(~moving & self.has_target[:n]).tolist():
+            robots[slot].on_path_end()
+            if not self.has_target[slot]:
+                finished.append(robots[slot])
+        self.ticks += 1
+        return finished
+
+    def busy(self):
+        """
+        :return: True while any robot still has a target
+        """
+        return bool(self.has_target[:self.size].any())
+
+    def _grow_slots(self, capacity):
+        n = len(self.has_target)
+        self.positions = np.concatenate([self.positions, np.zeros((capacity - n, 2), dtype=np.int64)])
+        for name in ("has_target", "cursor", "end"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros(capacity - n, dtype=array.dtype)]))
+
+    def _compact(self, extra):
+        """
+        Move all remaining paths to the front of the buffer, dropping cells already
+        walked, and grow the buffer if there is still no room for extra cells
+        """
+        n = self.size
+        lengths = self.end[:n] - self.cursor[:n]
+        used = int(lengths.sum())
+        capacity = len(self.buffer)
+        while used + extra > capacity // 2:
+            capacity *= 2
+        starts = np.cumsum(lengths) - lengths
+        cells = np.repeat(self.cursor[:n] - starts, lengths) + np.arange(used)
+        buffer = np.zeros((capacity, 2), dtype=np.int64)
+        buffer[:used] = self.buffer[cells]
+        self.buffer = buffer
+        self.buffer_used = used
+        self.cursor[:n] = starts
+        self.end[:n] = starts + lengths
+
+
+class EventScheduler:
+    """
+    Runs a SimulationEngine from event to event instead of tick by tick. A robot that
+    follows a path of L cells from tick t needs no attention until tick t + L + 1, when
+    it calls on_path_end(), so the scheduler keeps those arrival times in a heap and
+    jumps straight to the next one; the run takes time in the number of arrivals, new
+    targets and scheduled callbacks rather than in the length of the paths.
+
+    Robots are not moved between events. The tick every slot was last brought up to
+    date is kept, and its position and remaining path are worked out from that only when
+    someone asks for them (through the engine or the robot), when its path is replaced,
+    and for all robots at once before observers are called and at the end of a run.
+    Position and batch listeners hear about a move when the position is worked out. The result at
+    every tick is the same as with engine.step(). A scheduler is attached to its engine
+    from creation until the end of run(); create a new one for every event driven run.
+    """
+    def __init__(self, engine):
+        """
+        :param engine: SimulationEngine to run; paths set on it from now on are scheduled
+        """
+        self.engine = engine
+        engine.scheduler = self
+        self.synced = np.full(len(engine.has_target), engine.ticks, dtype=np.int64)  # Tick each slot is up to date at
+        self.generation = np.zeros(len(engine.has_target), dtype=np.int64)  # Bumped on every new path, to drop stale arrivals
+        self.events = []  # Heap of (tick, 0, slot, generation) arrivals and (tick, 1, order, callback) callbacks
+        self.order = 0
+        for slot in range(engine.size):
+            self._push_arrival(slot)
+
+    @property
+    def now(self):
+        return self.engine.ticks
+
+    def schedule(self, tick, callback):
+        """
+        Call callback() at a given tick, after the arrivals of that tick; used for
+        replanning and other triggers that do not come from the robots themselves
+        """
+        self.order += 1
+        heapq.heappush(self.events, (tick, 1, self.order, callback))
+
+    def sync(self, slot):
+        """
+        Bring the cursor and position of one robot up to the current tick
+        """
+        self._ensure(slot + 1)
+        engine = self.engine
+        elapsed = engine.ticks - int(self.synced[slot])
+        if not elapsed:
+            return
+        self.synced[slot] = engine.ticks
+        cursor, end = int(engine.cursor[slot]), int(engine.end[slot])
+        moved = min(elapsed, end - cursor)
+        if moved > 0:
+            engine.cursor[slot] = cursor + moved
+            engine.positions[slot] = engine.buffer[min(cursor + moved, end - 1)]
+            robot = engine.robots[slot]
+            if robot.position_listeners:
+                position = tuple(engine.positions[slot].tolist())
+                for listener in robot.position_listeners:
+                    listener.on_position_changed(robot, position)
+            engine.positions_changed(np.array([slot]))
+
+    def sync_all(self):
+        """
+        Bring every robot up to the current tick with a few array operations
+        """
+        engine = self.engine
+        n = engine.size
+        self._ensure(n)
+        cursor, end = engine.cursor[:n], engine.end[:n]
+        moved = np.minimum(engine.ticks - self.synced[:n], end - cursor)
+        slots = np.flatnonzero(moved > 0)
+        cursor[slots] += moved[slots]
+        engine.positions[slots] = engine.buffer[np.minimum(cursor[slots], end[slots] - 1)]
+        self.synced[:n] = engine.ticks
+        for slot in slots.tolist():
+            robot = engine.robots[slot]
+            if robot.position_listeners:
+                position = engine.position(slot)
+                for listener in robot.position_listeners:
+                    listener.on_position_changed(robot, position)
+        if len(slots):
+            engine.positions_changed(slots)
+
+    def path_changed(self, slot):
+        # Called by the engine after a robot got a new path at the current tick
+        self._ensure(slot + 1)
+        self.synced[slot] = self.engine.ticks
+        self.generation[slot] += 1
+        self._push_arrival(slot)
+
+    def run(self, observers=(), observe_every=None, max_ticks=None):
+        """
+        Process events until no robot has a target left
+        :param observers: Objects with an on_tick(engine, tick) method, as for runner.simulate,
+            called once at the start and after the events of every tick that has some;
+            the run stops early when one returns True
+        :param observe_every: Also call the observers every this many ticks, e.g. 1 for an animation
+        :param max_ticks: Optional limit on the number of ticks from the start of the run
+        :return: Tick at which the last robot finished, counted from the start of the run
+        """
+        engine = self.engine
+        start = engine.ticks
+        for slot in range(engine.size):
+            if engine.has_target[slot] and not engine.path_length(slot):
+                self._push_arrival(slot)  # has_target may have been set after the path ran out
+        stopped = self._observe(observers)
+        while not stopped and self.events and engine.busy():
+            tick = max(self.events[0][0], engine.ticks)
+            if observe_every is not None:
+                tick = min(tick, engine.ticks + observe_every)
+            if max_ticks is not None and tick - start > max_ticks:
+                engine.ticks = start + max_ticks
+                break
+            engine.ticks = tick
+            while self.events and self.events[0][0] <= tick:
+                _, kind, key, value = heapq.heappop(self.events)
+                if kind == 1:
+                    value()
+                elif value == self.generation[key] and engine.has_target[key]:
+                    self.sync(key)
+                    engine.robots[key].on_path_end()
+            stopped = self._observe(observers)
+        # Leave every robot up to date and hand the engine back to step()
+        self.sync_all()
+        engine.scheduler = None
+        return engine.ticks - start
+
+    def _observe(self, observers):
+        if not observers:
+            return False
+        self.sync_all()
+        stopped = False
+        for observer in observers:
+            stopped = observer.on_tick(self.engine, self.engine.ticks) or stopped
+        return stopped
+
+    def _push_arrival(self, slot):
+        # on_path_end() is due on the tick after the last cell of the path is reached
+        engine = self.engine
+        tick = int(self.synced[slot]) + int(engine.end[slot] - engine.cursor[slot]) + 1
+        heapq.heappush(self.events, (tick, 0, slot, int(self.generation[slot])))
+
+    def _ensure(self, size):
+        # Slots added to the engine after the scheduler start up to date at the current tick
+        n = len(self.synced)
+        if size > n:
+            capacity = max(size, 2 * n)
+            self.synced = np.concatenate([self.synced, np.full(capacity - n, self.engine.ticks, dtype=np.int64)])
+            self.generation = np.concatenate([self.generation, np.zeros(capacity - n, dtype=np.int64)])
@@ -0,0 +1,187 @@
+import numpy as np
+
+
+class GridIndex:
+    """
+    Index of items by grid position for nearest neighbour queries in the Manhattan
+    metric. Items live in square buckets, so inserting, removing and moving an item is
+    O(1); queries scan rings of buckets outwards from the query position. Among items
+    at the same distance the one inserted first comes first, like min() over a list.
+    """
+    def __init__(self, bucket_size=8):
+        """
+        :param bucket_size: Width and height of a bucket in cells
+        """
+        self.bucket_size = bucket_size
+        self.items = {}  # item -> (position, insertion order, bucket)
+        self.buckets = {}  # bucket -> {item: None}, in insertion order
+        self.bounds = None  # (min bucket x, max bucket x, min bucket y, max bucket y) ever used
+        self._order = 0
+        self.moved = {}  # Followed engine -> boolean array of slots moved since the last query
+        self.pending = {}  # Followed engines with marked slots, in the order they first moved
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def insert(self, item, position):
+        """
+        :param item: Hashable item, not yet in the index
+        :param position: (x, y) tuple
+        """
+        bucket = self._bucket(position)
+        self.items[item] = (position, self._order, bucket)
+        self._order += 1
+        self._add_to_bucket(item, bucket)
+
+    def remove(self, item):
+        _, _, bucket = self.items.pop(item)
+        self._remove_from_bucket(item, bucket)
+
+    def move(self, item, position):
+        """
+        Update the position of an item, keeping its place in the tie order
+        """
+        _, order, bucket = self.items[item]
+        new_bucket = self._bucket(position)
+        self.items[item] = (position, order, new_bucket)
+        if new_bucket != bucket:
+            self._remove_from_bucket(item, bucket)
+            self._add_to_bucket(item, new_bucket)
+
+    def on_position_changed(self, item, position):
+        # Robot position listener
+        if item in self.items:
+            self.move(item, position)
+
+    def follow(self, engine):
+        """
+        Keep the items that are robots of a SimulationEngine up to date without a call per
+        move: the engine marks the slots that moved in a tick all at once, and the marked
+        items are moved in the index before the next query
+        """
+        engine.add_batch_listener(self)
+        self.moved.setdefault(engine, np.zeros(0, dtype=bool))
+
+    def on_positions_changed(self, engine, slots):
+        # Engine batch listener
+        moved = self.moved[engine]
+        if len(moved) < engine.size:
+            moved = self.moved[engine] = np.concatenate([moved, np.zeros(engine.size - len(moved), dtype=bool)])
+        moved[slots] = True
+        self.pending[engine] = None
+
+    def _catch_up(self):
+        for engine in self.pending:
+            moved = self.moved[engine]
+            slots = np.flatnonzero(moved)
+            moved[:] = False
+            for slot in slots.tolist():
+                robot = engine.robots[slot]
+                if robot in self.items:
+                    self.move(robot, robot.position)
+        self.pending.clear()
+
+    def nearest(self, position, k=1, accept=None):
+        """
+        Find the k items closest to a position
+        :param position: (x, y) tuple
+        :param k: Number of items wanted
+        :param accept: Optional function returning False for items to leave out
+        :return: List of up to k items, closest first
+        """
+        if not self.items:
+            return []
+        self._catch_up()
+        size = self.bucket_size
+        x, y = position
+        bx, by = x // size, y // size
+        min_bx, max_bx, min_by, max_by = self.bounds
+        last_ring = max(bx - min_bx, max_bx - bx, by - min_by, max_by - by)
+        found = []
+        ring = 0
+        while ring <= last_ring:
+            for bucket in self._ring(bx, by, ring):
+                for item in self.buckets.get(bucket, ()):
+                    if accept is None or accept(item):
+                        (ix, iy), order, _ = self.items[item]
+                        found.append((abs(ix - x) + abs(iy - y), order, item))
+            # Everything in the next ring is at least ring * size + 1 away
+            if len(found) >= k:
+                found.sort(key=lambda entry: entry[:2])
+                del found[k:]
+                if found[-1][0] <= ring * size:
+                    break
+            ring += 1
+        found.sort(key=lambda entry: entry[:2])
+        return [entry[2] for entry in found[:k]]
+
+    def _bucket(self, position):
+        return position[0] // self.bucket_size, position[1] // self.bucket_size
+
+    def _add_to_bucket(self, item, bucket):
+        self.buckets.setdefault(bucket, {})[item] = None
+        bx, by = bucket
+        if self.bounds is None:
+            self.bounds = (bx, bx, by, by)
+        else:
+            min_bx, max_bx, min_by, max_by = self.bounds
+            self.bounds = (min(min_bx, bx), max(max_bx, bx), min(min_by, by), max(max_by, by))
+
+    def _remove_from_bucket(self, item, bucket):
+        items = self.buckets[bucket]
+        del items[item]
+        if not items:
+            del self.buckets[bucket]
+
+    @staticmethod
+    def _ring(bx, by, ring):
+        """
+        Buckets at Chebyshev distance ring from (bx, by)
+        """
+        if ring == 0:
+            yield bx, by
+            return
+        for i in range(bx - ring, bx + ring + 1):
+            yield i, by - ring
+            yield i, by + ring
+        for j in range(by - ring + 1, by + ring):
+            yield bx - ring, j
+            yield bx + ring, j
+
+
+class LetterIndex:
+    """
+    Letter cells of a maze in square buckets, so that the letters inside a window can be
+    listed by looking at the few buckets it overlaps instead of at every cell. A cell
+    counts as a letter when its content isalpha(). Built once per maze layout, see
+    GridMap.get_derived.
+    """
+    def __init__(self, grid, bucket_size=8):
+        """
+        :param grid: GridMap of the maze
+        :param bucket_size: Width and height of a bucket in cells
+        """
+        self.bucket_size = bucket_size
+        self.buckets = {}  # bucket -> list of (x, y, letter)
+        for x, row in enumerate(grid.maze):
+            for y, cell in enumerate(row):
+                if cell.isalpha():
+                    self.buckets.setdefault((x // bucket_size, y // bucket_size), []).append((x, y, cell))
+
+    def window(self, min_x, max_x, min_y, max_y):
+        """
+        Find the letters with min_x <= x <= max_x and min_y <= y <= max_y
+        :return: List of (x, y, letter) tuples in row-major order
+        """
+        size = self.bucket_size
+        found = []
+        for bx in range(min_x // size, max_x // size + 1):
+            for by in range(min_y // size, max_y // size + 1):
+                for entry in self.buckets.get((bx, by), ()):
+                    if min_x <= entry[0] <= max_x and min_y <= entry[1] <= max_y:
+                        found.append(entry)
+        found.sort()
+        return found
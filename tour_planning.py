@@ -0,0 +1,152 @@
+import numpy as np
+
+UNREACHABLE = 1e15  # Stands in for infinite costs so that cost differences stay finite
+
+
+def plan_tours(start_costs, leg_costs, max_moves=1000):
+    """
+    Split targets into one ordered tour per agent so that the last target is reached
+    as early as possible (minimum makespan). Tours are built by cheapest insertion,
+    then improved by 2-opt within each tour and by Or-opt moves of segments of up to
+    three targets out of the longest tour.
+    :param start_costs: Array (agents x targets) of costs from every agent to every target, inf if unreachable
+    :param leg_costs: Symmetric array (targets x targets) of costs between targets, inf if unreachable
+    :param max_moves: Maximum number of Or-opt moves
+    :return: List with the ordered target indices of every agent; targets no agent can reach are left out
+    """
+    start_costs = np.minimum(np.asarray(start_costs, dtype=float), UNREACHABLE).tolist()
+    leg_costs = np.minimum(np.asarray(leg_costs, dtype=float), UNREACHABLE).tolist()
+    n_agents = len(start_costs)
+    n_targets = len(leg_costs)
+    planner = _TourPlanner(start_costs, leg_costs)
+    tours = [[] for _ in range(n_agents)]
+    costs = [0.0] * n_agents
+    if not n_agents:
+        return tours
+
+    # Targets far from every agent go first, while the tours are still flexible
+    nearest = [min(start_costs[agent][target] for agent in range(n_agents)) for target in range(n_targets)]
+    for target in sorted(range(n_targets), key=lambda t: -nearest[t]):
+        if nearest[target] >= UNREACHABLE:
+            continue
+        makespan = max(costs)
+        best = None
+        for agent, tour in enumerate(tours):
+            for position in range(len(tour) + 1):
+                delta = planner.insertion_delta(agent, tour, position, [target])
+                key = (max(makespan, costs[agent] + delta), delta)
+                if best is None or key < best[0]:
+                    best = (key, agent, position, delta)
+        _, agent, position, delta = best
+        tours[agent].insert(position, target)
+        costs[agent] += delta
+
+    for agent in range(n_agents):
+        costs[agent] = planner.two_opt(agent, tours[agent])
+    for _ in range(max_moves):
+        if not planner.or_opt(tours, costs):
+            break
+    return tours
+
+
+class _TourPlanner:
+    """
+    Cost bookkeeping for open tours that start at an agent and visit targets in order
+    """
+    def __init__(self, start_costs, leg_costs):
+        self.start_costs = start_costs
+        self.leg_costs = leg_costs
+
+    def cost(self, agent, previous, target):
+        # previous is None for the agent's own start position
+        if previous is None:
+            return self.start_costs[agent][target]
+        return self.leg_costs[previous][target]
+
+    def tour_cost(self, agent, tour):
+        if not tour:
+            return 0.0
+        return self.start_costs[agent][tour[0]] + sum(self.leg_costs[a][b] for a, b in zip(tour, tour[1:]))
+
+    def insertion_delta(self, agent, tour, position, segment):
+        """
+        Cost increase of inserting a segment of targets before tour[position]
+        """
+        previous = tour[position - 1] if position else None
+        delta = self.cost(agent, previous, segment[0])
+        delta += sum(self.leg_costs[a][b] for a, b in zip(segment, segment[1:]))
+        if position < len(tour):
+            following = tour[position]
+            delta += self.leg_costs[segment[-1]][following] - self.cost(agent, previous, following)
+        return delta
+
+    def removal_delta(self, agent, tour, first, last):
+        """
+        Cost decrease of removing tour[first:last + 1]
+        """
+        previous = tour[first - 1] if first else None
+        delta = self.cost(agent, previous, tour[first])
+        delta += sum(self.leg_costs[a][b] for a, b in zip(tour[first:last], tour[first + 1:last + 1]))
+        if last + 1 < len(tour):
+            following = tour[last + 1]
+            delta += self.leg_costs[tour[last]][following] - self.cost(agent, previous, following)
+        return delta
+
+    def two_opt(self, agent, tour):
+        """
+        Reverse segments of a tour while that shortens it
+        :return: Cost of the improved tour
+        """
+        improved = True
+        while improved:
+            improved = False
+            for first in range(len(tour) - 1):
+                previous = tour[first - 1] if first else None
+                for last in range(first + 1, len(tour)):
+                    before = self.cost(agent, previous, tour[first])
+                    after = self.cost(agent, previous, tour[last])
+                    if last + 1 < len(tour):
+                        before += self.leg_costs[tour[last]][tour[last + 1]]
+                        after += self.leg_costs[tour[first]][tour[last + 1]]
+                    if after < before:
+                        tour[first:last + 1] = tour[first:last + 1][::-1]
+                        improved = True
+        return self.tour_cost(agent, tour)
+
+    def or_opt(self, tours, costs):
+        """
+        Move one segment of up to three targets out of the longest tour, to wherever
+        that lowers the longer of the two tours involved the most
+        :return: True if a move was made
+        """
+        source = max(range(len(tours)), key=costs.__getitem__)
+        tour = tours[source]
+        best = None
+        for length in (1, 2, 3):
+            for first in range(len(tour) - length + 1):
+                last = first + length - 1
+                removed = self.removal_delta(source, tour, first, last)
+                rest = tour[:first] + tour[last + 1:]
+                segment = tour[first:last + 1]
+                for orientation in (segment, segment[::-1]):
+                    for target_agent, target_tour in enumerate(tours):
+                        if target_agent == source:
+                            target_tour, base = rest, costs[source] - removed
+                        else:
+                            base = costs[target_agent]
+                        for position in range(len(target_tour) + 1):
+                            added = self.insertion_delta(target_agent, target_tour, position, orientation)
+                            if target_agent == source:
+                                longest = base + added
+                            else:
+                                longest = max(costs[source] - removed, base + added)
+                            if longest < costs[source] - 1e-9 and (best is None or longest < best[0]):
+                                best = (longest, first, last, orientation, target_agent, position)
+        if best is None:
+            return False
+        _, first, last, orientation, target_agent, position = best
+        del tour[first:last + 1]
+        tours[target_agent][position:position] = orientation
+        costs[source] = self.two_opt(source, tour)
+        costs[target_agent] = self.two_opt(target_agent, tours[target_agent])
+        return True
@@ -3,14 +3,17 @@ import matplotlib.animation as animation
 import numpy as np
 
 class MazeVisualizer:
-    def __init__(self, maze, robots):
+    def __init__(self, maze, robots=None, pause_interval=0.2):
         """
         Initialize the maze visualizer
         :param maze: 2D list representing the maze
-        :param robots: Dictionary of robots with their types as keys
+        :param robots: Dictionary of robots with their types as keys; as an observer of a
+            simulation, defaults to the engine's robots as excavators
+        :param pause_interval: Seconds to show every frame as an observer
         """
         self.maze = maze
         self.robots = robots
+        self.pause_interval = pause_interval
         self.fig, self.ax = plt.subplots(figsize=(10, 10))
         self.animation = None
         
@@ -92,6 +95,20 @@ class MazeVisualizer:
         #     self.ax.plot(y, x, '^', color=self.colors['controller'],
         #                 markersize=12, label='Controller')
 
+    def on_tick(self, engine, tick):
+        """
+        Observer hook for runner.simulate: draw the current state and pause
+        """
+        if self.robots is None:
+            self.robots = {'excavators': engine.robots}
+        self.plot_maze()
+        self.plot_robots()
+        self.ax.set_title(f'Tick {tick}')
+        plt.pause(self.pause_interval)
+
+    def close(self):
+        plt.close(self.fig)
+
     def update(self, frame):
         """
         Update function for animation